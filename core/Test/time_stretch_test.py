@@ -0,0 +1,58 @@
+# -*- coding:utf-8 -*-
+"""
+Level regression check for the local time-stretch (core/time_stretch.py).
+
+A steady tone must keep its level when slowed down or sped up, also when it
+starts right after silence (an onset) or abruptly at the first sample.
+
+    python core/Test/time_stretch_test.py
+    python -m pytest core/Test/time_stretch_test.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from core.time_stretch import TIME_STRETCH_AVAILABLE, time_stretch
+
+SAMPLE_RATE = 24000
+SPEEDS = (0.5, 0.75, 0.95, 1.2, 1.5, 2.0)
+LEADING_SILENCE_S = (0.0, 0.2)
+# Allowed level change of the steady part, in dB
+TOLERANCE_DB = 1.0
+
+
+def _tone(leading_silence_s, duration_s=2.0, freq=440.0, amplitude=0.5):
+    import numpy as np
+    t = np.arange(int(SAMPLE_RATE * duration_s)) / SAMPLE_RATE
+    silence = np.zeros(int(SAMPLE_RATE * leading_silence_s))
+    return np.concatenate([silence, amplitude * np.sin(2 * np.pi * freq * t)]).astype(np.float32)
+
+
+def _level_db(leading_silence_s, speed):
+    """Level change of the steady part of a stretched tone (edges skipped)."""
+    import numpy as np
+    samples = _tone(leading_silence_s)
+    stretched = time_stretch(samples, speed)
+    start = int((leading_silence_s + 0.3) * SAMPLE_RATE / speed)
+    end = len(stretched) - int(0.3 * SAMPLE_RATE / speed)
+    steady_in = samples[int((leading_silence_s + 0.3) * SAMPLE_RATE):-int(0.3 * SAMPLE_RATE)]
+    rms_out = np.sqrt(np.mean(stretched[start:end] ** 2))
+    rms_in = np.sqrt(np.mean(steady_in ** 2))
+    return 20 * np.log10(rms_out / rms_in)
+
+
+def test_steady_tone_keeps_level():
+    if not TIME_STRETCH_AVAILABLE:
+        print("Skipped: numpy and miniaudio are not installed")
+        return
+    for leading_silence_s in LEADING_SILENCE_S:
+        for speed in SPEEDS:
+            level = _level_db(leading_silence_s, speed)
+            assert abs(level) <= TOLERANCE_DB, (
+                f"speed {speed}, {leading_silence_s}s leading silence: level changed by {level:+.1f} dB")
+
+
+if __name__ == "__main__":
+    test_steady_tone_keeps_level()
+    print("OK")
@@ -5,27 +5,27 @@ OCR 功能仅在 Windows 平台可用。
 """
 import os
 import sys
+import difflib
 import threading
-import asyncio
+import concurrent.futures
 from typing import List, Optional, Callable
 
 from platform_factory.audio_player_impl import create_audio_player
 from interface.audio_player_base import AudioPlayerBase
 
-from .tts_engine import TTSEngine
+from .tts_engine import TTSEngine, VOICE_DICT
+from .sentence_search import SearchHit
+from .transport import get_transport
+from .audio_stream import PREROLL_BYTES
+from .time_stretch import TIME_STRETCH_AVAILABLE
+from .document_processor import synthesize_document
 from .ocr_engine import OCREngine, BAIDU_OCR_AVAILABLE
 
 
-VOICE_DICT = {
-    "Mandarin Female (Xiaoyi)": "zh-CN-XiaoyiNeural",  # Cartoon, Novel
-    "Mandarin Female (Xiaoxiao)": "zh-CN-XiaoxiaoNeural",  # News, Novel
-    "Mandarin Male (Yunxi)": "zh-CN-YunxiNeural",  # Novel
-    "Mandarin Male (Yunjian)": "zh-CN-YunjianNeural",  # Sports, Novel
-    "Mandarin Male (Yunxia)": "zh-CN-YunxiaNeural",  # Cartoon, Novel
-    "Mandarin Male (Yunyang)": "zh-CN-YunyangNeural",  # News
-    "Northeast Mandarin Female (Xiaobei)": "zh-CN-liaoning-XiaobeiNeural",  # Dialect
-    "Shaanxi Mandarin Female (Xiaoni)": "zh-CN-shaanxi-XiaoniNeural",  # Dialect
-}
+# 多个实例共用的缓存目录 (如网络共享目录), 未设置时使用本机缓存
+SHARED_CACHE_ENV = "MANDARIN_TTS_SHARED_CACHE"
+# 额外挂载的只读缓存包目录 (预热任务生成, 见 prewarm), 多个目录以 os.pathsep 分隔
+CACHE_PACKS_ENV = "MANDARIN_TTS_CACHE_PACKS"
 
 class AppController:
     """
@@ -45,7 +45,9 @@ class AppController:
                  on_sentences_ready: Callable[[List[str]], None],
                  on_buttons_update: Callable[[bool, bool, bool], None],
                  on_mode_change: Callable[[str], None],
-                 on_ocr_result: Callable[[str], None]):
+                 on_ocr_result: Callable[[str], None],
+                 packed_cache: bool = False,
+                 shared_cache_dir: Optional[str] = None):
         # 回调到 UI
         self._on_status = on_status
         self._on_sentences_ready = on_sentences_ready
@@ -54,9 +56,22 @@ class AppController:
         self._on_ocr_result = on_ocr_result
 
         # 引擎
-        self.tts_engine = TTSEngine(clear_cache_on_start=True)
-        self.ocr_engine = OCREngine()
+        # TTS 与 OCR 共用同一出站传输层 (TLS 上下文、DNS 缓存、按主机并发限制)
+        transport = get_transport()
+        # 音频缓存跨会话保留, 超出容量时在后台按最近最少使用淘汰; 需要时可调用 clear_cache 清空
+        # packed_cache=True: 句子音频存入少量打包文件 (segment_store), 而非每句一个小文件
+        # shared_cache_dir: 与其他实例共用的缓存目录 (跨进程加锁, 见 shared_cache)
+        # 启动时挂载默认目录 cache_packs 及 CACHE_PACKS_ENV 中的缓存包
+        self.tts_engine = TTSEngine(
+            clear_cache_on_start=False, transport=transport, packed_store=packed_cache,
+            shared_cache_dir=shared_cache_dir or os.environ.get(SHARED_CACHE_ENV) or None,
+            pack_dirs=[d for d in os.environ.get(CACHE_PACKS_ENV, "").split(os.pathsep) if d])
+        self.ocr_engine = OCREngine(transport=transport)
         self.player: AudioPlayerBase = create_audio_player()
+        # 当前配置(文本/发音人/语速)的取消作用域, 配置变化时整体取消旧任务
+        self._scope = self.tts_engine.new_scope("initial")
+        # 后台预热到 edge-tts 的连接, 首次点击 Process 时免去建连耗时
+        self.tts_engine.prewarm()
 
         # OCR 可用性标志
         self.ocr_available = BAIDU_OCR_AVAILABLE
@@ -68,6 +83,27 @@ class AppController:
         self.infinite_loop: bool = False
         self.repeat_count: int = 1
         self.interval_ms: int = 500
+        # 'direct': 整段文本单独合成一次; 'segments': 由单句音频片段拼接整段音频;
+        # 'pipelined': 逐句合成并按顺序连续播放, 全部完成后再拼接整段音频
+        self.full_audio_source: str = 'direct'
+        # 整段音频带有句子时间索引时, 单句直接从整段音频切出, 不再逐句预合成
+        self.slice_sentences_from_full: bool = True
+        # 本地变速: 只合成 0% 语速的音频, 其他语速由本地时间伸缩得到 (不改变音高, 无需网络请求)
+        self.local_speed: bool = False
+        self._base_full_audio_path: Optional[str] = None
+        self._stretch_generation: int = 0
+        # 增量合成: 与上次处理结果对比, 相同句子复用已有音频, 仅合成新增/修改的句子。
+        # 可复用句子占比达到该阈值时, 整段音频由片段拼接而不是整段重新合成
+        self.incremental_min_reuse: float = 0.5
+        # 上次成功处理的 (voice, speed, sentences, 整段音频路径)
+        self._last_render: Optional[tuple] = None
+        # 预测合成 (可选): 输入停顿后以最低优先级预先合成当前文本的句子, 每轮最多 speculative_budget 个请求
+        self.speculative: bool = False
+        self.speculative_idle_s: float = 1.0
+        self.speculative_budget: int = 30
+        self._speculative_scope = None
+        self._speculative_timer: Optional[threading.Timer] = None
+        self._speculative_key: Optional[tuple] = None
 
         self.is_processing: bool = False
         self.is_batch_processing: bool = False
@@ -95,6 +131,9 @@ class AppController:
     # ---------------- Configuration -----------------
     def set_voice(self, ui_voice_name: str):
         self.selected_voice_ui = ui_voice_name
+        self._renew_scope(f"voice={ui_voice_name}")
+        self._cancel_speculation()
+        self.tts_engine.prewarm()
         self._on_status(f"Status: Ready Voice changed -> {ui_voice_name} Re-generate required")
         self.stop_audio()
         self.full_audio_path = None
@@ -103,10 +142,17 @@ class AppController:
         self.selected_single_text = ''
         self.selected_single_idx = -1
         self.speed_percent = 0
+        self._base_full_audio_path = None
         self._on_mode_change(self.repeat_mode)
         self._update_buttons()
 
     def set_speed(self, percent: int):
+        if self.local_speed:
+            self._set_speed_locally(percent)
+            return
+        if percent != self.speed_percent:
+            self._renew_scope(f"speed={percent:+d}%")
+            self._cancel_speculation()
         self.speed_percent = percent
         self.full_audio_path = None
         self.single_audio_path = None
@@ -115,6 +161,126 @@ class AppController:
         self._on_status(f"Status: Ready Speed: {percent:+d}% Click 'Process' to regenerate")
         self._update_buttons()
 
+    def set_local_speed(self, enabled: bool):
+        """开启/关闭本地变速。开启后语速调整不再重新合成, 而是对 0% 语速的音频做本地时间伸缩。"""
+        if enabled and not TIME_STRETCH_AVAILABLE:
+            self._on_status("Status: Error Local speed change needs numpy and miniaudio")
+            return
+        if bool(enabled) == self.local_speed:
+            return
+        self.local_speed = bool(enabled)
+        # 合成语速改变, 旧的音频与任务均失效
+        self._renew_scope(f"local_speed={self.local_speed}")
+        self._cancel_speculation()
+        self.full_audio_path = None
+        self.single_audio_path = None
+        self._base_full_audio_path = None
+        if self.is_playing or self.is_paused:
+            self.stop_audio()
+        self._update_buttons()
+
+    def _synthesis_speed(self) -> int:
+        """实际请求 edge-tts 的语速: 本地变速模式下始终为 0%。"""
+        return 0 if self.local_speed else int(self.speed_percent)
+
+    def _apply_local_speed(self, audio_path: str, percent: int) -> str:
+        """本地变速模式下把 0% 语速的音频伸缩到 percent; 返回新路径或 Error 字符串。"""
+        if not self.local_speed or not percent or str(audio_path).startswith("Error"):
+            return audio_path
+        return self.tts_engine.stretch_audio(audio_path, percent)
+
+    def _set_speed_locally(self, percent: int):
+        self.speed_percent = percent
+        self.single_audio_path = None
+        if self.is_playing or self.is_paused:
+            self.stop_audio()
+        base_path = self._base_full_audio_path
+        if not base_path:
+            self.full_audio_path = None
+            self._on_status(f"Status: Ready Speed: {percent:+d}% Click 'Process' to generate")
+            self._update_buttons()
+            return
+
+        self._stretch_generation += 1
+        generation = self._stretch_generation
+        self.full_audio_path = None
+        self._update_buttons()
+
+        def _work():
+            # 滑块拖动时只处理最后一个值
+            import time; time.sleep(0.3)
+            if generation != self._stretch_generation:
+                return
+            self._on_status(f"Status: Processing Speed: {percent:+d}% Applying speed locally...")
+            audio_path = self._apply_local_speed(base_path, percent)
+            if generation != self._stretch_generation or base_path != self._base_full_audio_path:
+                return
+            if str(audio_path).startswith("Error"):
+                self._on_status(f"Status: Error Speed: {percent:+d}% {audio_path}")
+            else:
+                self.full_audio_path = audio_path
+                self._on_status(f"Status: Ready Speed: {percent:+d}% Applied locally")
+            self._update_buttons()
+
+        threading.Thread(target=_work, daemon=True).start()
+
+    def set_speculative(self, enabled: bool):
+        """开启/关闭预测合成。"""
+        self.speculative = bool(enabled)
+        if not self.speculative:
+            self._cancel_speculation()
+
+    # ---------------- Speculative pre-synthesis -----------------
+    def on_input_changed(self, text: str):
+        """输入文本变化时由 UI 调用; 停顿 speculative_idle_s 秒后开始预测合成。"""
+        if not self.speculative:
+            return
+        if self._speculative_timer is not None:
+            self._speculative_timer.cancel()
+        self._speculative_timer = threading.Timer(self.speculative_idle_s, self._speculate, args=(text,))
+        self._speculative_timer.daemon = True
+        self._speculative_timer.start()
+
+    def _speculate(self, text: str):
+        text = (text or '').strip()
+        if not self.speculative or self.is_processing or not text:
+            return
+        voice = VOICE_DICT.get(self.selected_voice_ui, VOICE_DICT["Mandarin Female (Xiaoyi)"])
+        speed = self._synthesis_speed()
+        key = (text, voice, speed)
+        if key == self._speculative_key:
+            return
+        # 文本已变化: 上一轮尚未完成的预测任务作废
+        if self._speculative_scope is not None:
+            self._speculative_scope.cancel()
+        self._speculative_scope = self.tts_engine.new_scope("speculative")
+        self._speculative_key = key
+        sentences = self.tts_engine.text_to_sentences(text)
+        futures = self.tts_engine.submit_speculative(sentences, voice, speed, scope=self._speculative_scope,
+                                                     budget=self.speculative_budget)
+        if futures:
+            print(f"[Controller] Speculatively pre-rendering {len(futures)} of {len(sentences)} sentence(s)")
+
+    def _cancel_speculation(self):
+        if self._speculative_timer is not None:
+            self._speculative_timer.cancel()
+            self._speculative_timer = None
+        if self._speculative_scope is not None:
+            cancelled = self._speculative_scope.cancel()
+            if cancelled:
+                print(f"[Controller] Cancelled {cancelled} speculative synthesis task(s)")
+            self._speculative_scope = None
+        self._speculative_key = None
+
+    def set_full_audio_source(self, source: str):
+        """切换整段音频的生成方式: 'direct'、'segments' 或 'pipelined'。"""
+        if source not in ('direct', 'segments', 'pipelined'):
+            self._on_status(f"Status: Error Unknown full audio source: {source}")
+            return
+        self.full_audio_source = source
+        self.full_audio_path = None
+        self._update_buttons()
+
     def set_repeat_config(self, mode: str, infinite: bool, count: int, interval_ms: int):
         self.repeat_mode = mode
         self.infinite_loop = infinite
@@ -178,40 +344,150 @@ class AppController:
             return
 
         self.is_processing = True
+        scope = self._renew_scope("process_text")
         self.stop_audio()
         self.full_audio_path = None
         self.single_audio_path = None
+        self._base_full_audio_path = None
         self._update_buttons()
 
         current_voice = VOICE_DICT.get(self.selected_voice_ui, VOICE_DICT["Mandarin Female (Xiaoyi)"])
-        current_speed = int(self.speed_percent)
+        current_speed = self._synthesis_speed()
+        target_speed = int(self.speed_percent)
+        # 需要本地变速时, 合成中的音频语速不对, 不做边合成边播放
+        live_play = auto_play and current_speed == target_speed
 
         def _batch_thread():
             try:
+                # 批处理写入任务日志: 中断 (关闭程序、断网) 后再次处理同一文本时从中断处继续
                 while not self.sentences:
+                    if scope.cancelled:
+                        return
                     import time; time.sleep(0.1)
-                asyncio.run(self.tts_engine.process_all_sentences(self.sentences, current_voice, current_speed))
+                batch = self.tts_engine.submit_batch(self.sentences, current_voice, current_speed,
+                                                     scope=scope, resumable=True).result()
+                if batch.failed:
+                    self._on_status(f"Status: Ready Pre-caching finished with {len(batch.failed)} of "
+                                    f"{len(batch)} sentences failed")
+            except concurrent.futures.CancelledError:
+                pass
             finally:
-                self.is_batch_processing = False
+                if scope is self._scope:
+                    self.is_batch_processing = False
                 self._update_buttons()
 
+        def _generate_from_segments():
+            # 单句片段合成即批处理本身, 整段音频只是最后的拼接步骤
+            self.sentences = self.tts_engine.text_to_sentences(input_text)
+            self._on_sentences_ready(self.sentences)
+            self._reuse_previous_render(self.sentences, current_voice, current_speed)
+            self._on_status(f"Status: Processing Play Type: Full Text Voice: {self.selected_voice_ui} "
+                            f"Generating {len(self.sentences)} sentence segments...")
+            self.is_batch_processing = True
+            self._update_buttons()
+            try:
+                audio_path = self.tts_engine.assemble_full_audio(self.sentences, current_voice, current_speed,
+                                                                 scope=scope, resumable=True)
+            finally:
+                if scope is self._scope:
+                    self.is_batch_processing = False
+            if str(audio_path).startswith("Error"):
+                raise Exception(audio_path)
+            self.full_audio_path = audio_path
+
+        def _generate_pipelined():
+            # 第 N 句播放时第 N+1 句继续合成; 返回是否已开始顺序播放
+            self.sentences = self.tts_engine.text_to_sentences(input_text)
+            self._on_sentences_ready(self.sentences)
+            self._reuse_previous_render(self.sentences, current_voice, current_speed)
+            futures = self.tts_engine.submit_sentences(self.sentences, current_voice, current_speed, scope=scope)
+            self.is_batch_processing = True
+            self._update_buttons()
+            started = False
+            if live_play and self.repeat_mode == 'full':
+                started = self._play_sequence(futures)
+            try:
+                failed = [f for f in futures if not f.result().ok]
+            finally:
+                if scope is self._scope:
+                    self.is_batch_processing = False
+            if failed:
+                raise Exception(f"{len(failed)} of {len(futures)} sentences failed: {failed[0].result().error}")
+            # 所有片段已缓存, 拼接整段音频只是本地操作, 供之后的播放使用
+            audio_path = self.tts_engine.assemble_full_audio(self.sentences, current_voice, current_speed,
+                                                             scope=scope)
+            if str(audio_path).startswith("Error"):
+                raise Exception(audio_path)
+            self.full_audio_path = audio_path
+            return started
+
+        def _generate_incrementally() -> bool:
+            # 大部分句子已有音频时 (文本只做了局部修改, 或预测合成已提前缓存):
+            # 复用这些句子, 只合成其余句子, 再拼接整段音频
+            sentences = self.tts_engine.text_to_sentences(input_text)
+            if not sentences or self.tts_engine.has_full_audio(sentences, current_voice, current_speed):
+                return False
+            self._reuse_previous_render(sentences, current_voice, current_speed)
+            reused = self.tts_engine.cached_sentence_count(sentences, current_voice, current_speed)
+            if reused < len(sentences) * self.incremental_min_reuse:
+                # 整段重新合成, 未完成的预测任务不再需要
+                self._cancel_speculation()
+                return False
+            self.sentences = sentences
+            self._on_sentences_ready(self.sentences)
+            self._on_status(f"Status: Processing Play Type: Full Text Voice: {self.selected_voice_ui} "
+                            f"Reusing {reused} sentences, generating {len(sentences) - reused}...")
+            audio_path = self.tts_engine.assemble_full_audio(self.sentences, current_voice, current_speed,
+                                                             scope=scope, resumable=True)
+            if str(audio_path).startswith("Error"):
+                raise Exception(audio_path)
+            self.full_audio_path = audio_path
+            return True
+
         def _main_thread():
+            streamed = False
             try:
                 self._on_status(f"Status: Processing Play Type: Full TextVoice: {self.selected_voice_ui} Splitting text...")
-                audio_path, sentences = self.tts_engine.generate_full_audio(input_text, current_voice, current_speed)
-                if str(audio_path).startswith("Error"):
-                    raise Exception(audio_path)
-                self.sentences = sentences or []
-                self._on_sentences_ready(self.sentences)
-                self.full_audio_path = audio_path
-                self._on_status(f"Status: Ready Play Type: Full Text Voice: {self.selected_voice_ui} Audio Generated Successfully")
-                self.is_batch_processing = True
-                threading.Thread(target=_batch_thread, daemon=True).start()
+                if self.full_audio_source == 'segments':
+                    _generate_from_segments()
+                elif self.full_audio_source == 'pipelined':
+                    streamed = _generate_pipelined()
+                elif _generate_incrementally():
+                    # 局部修改: 整段音频已由复用片段与新句子拼接完成
+                    pass
+                else:
+                    buffer, future, sentences = self.tts_engine.start_full_audio_stream(
+                        input_text, current_voice, current_speed, scope=scope)
+                    self.sentences = sentences or []
+                    self._on_sentences_ready(self.sentences)
+                    if live_play and self.repeat_mode == 'full' and buffer is not None:
+                        # 边合成边播放: 首批音频到达后即开始, 无需等待整段渲染完成
+                        if buffer.wait_for(PREROLL_BYTES) and not scope.cancelled:
+                            streamed = self._play_stream(buffer)
+                    audio_path = future.result()
+                    if str(audio_path).startswith("Error"):
+                        raise Exception(audio_path)
+                    self.full_audio_path = audio_path
+                    if not (self.slice_sentences_from_full and self.tts_engine.has_sentence_index(audio_path)):
+                        self.is_batch_processing = True
+                        threading.Thread(target=_batch_thread, daemon=True).start()
+                self._last_render = (current_voice, current_speed, list(self.sentences), self.full_audio_path)
+                if self.local_speed:
+                    self._base_full_audio_path = self.full_audio_path
+                    audio_path = self._apply_local_speed(self.full_audio_path, int(self.speed_percent))
+                    if str(audio_path).startswith("Error"):
+                        raise Exception(audio_path)
+                    self.full_audio_path = audio_path
+                if not streamed:
+                    self._on_status(f"Status: Ready Play Type: Full Text Voice: {self.selected_voice_ui} Audio Generated Successfully")
                 self._update_buttons()
-                if auto_play and self.full_audio_path:
+                if auto_play and self.full_audio_path and not streamed:
                     self._on_status("Status: Processing | Generation complete, starting playback...")
                     self.play_audio()
             except Exception as e:
+                if scope.cancelled:
+                    # 已被新的配置取代, 不再报告旧任务的结果
+                    return
                 self._on_status(f"Status: Error Play Type: Full Text Voice: {self.selected_voice_ui} Error: {e}")
             finally:
                 self.is_processing = False
@@ -219,9 +495,111 @@ class AppController:
 
         threading.Thread(target=_main_thread, daemon=True).start()
 
+    def _reuse_previous_render(self, sentences: List[str], voice: str, speed: int) -> int:
+        """
+        用 difflib 将新句子列表与上次处理的列表对比, 把未变化的句子从上次的整段音频
+        切到单句缓存。返回可直接复用 (已在缓存中) 的句子数; 文本未变或配置不同时返回 0。
+        """
+        last = self._last_render
+        if not last or last[0] != voice or last[1] != speed or last[2] == sentences:
+            return 0
+        old_sentences, old_path = last[2], last[3]
+        matcher = difflib.SequenceMatcher(None, old_sentences, sentences, autojunk=False)
+        items = [(i1 + k, sentences[j1 + k])
+                 for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag == 'equal'
+                 for k in range(i2 - i1)]
+        if not items:
+            return 0
+        return self.tts_engine.slice_sentences_from_full(old_path, items, voice, speed)
+
+    # ---------------- Long document (book mode) -----------------
+    def process_document(self, file_path: str, output_dir: Optional[str] = None):
+        """
+        长文档模式: 逐段读取文本文件, 按章节拆分, 每章经批处理合成后写出一个音频文件。
+        内存中只保留当前窗口的句子; 进度通过状态回调与句子列表回调报告。
+        默认输出目录为 <文件名>_audio, 已写出的章节在重新运行时跳过, 中断的章节从上次完成的窗口继续。
+        """
+        if self.is_processing:
+            self._on_status("Status: Processing Already running, please wait...")
+            return
+        if not file_path or not os.path.isfile(file_path):
+            self._on_status(f"Status: Error Document not found: {file_path}")
+            return
+        output_dir = output_dir or f"{os.path.splitext(file_path)[0]}_audio"
+
+        self.is_processing = True
+        scope = self._renew_scope("process_document")
+        self._cancel_speculation()
+        self.stop_audio()
+        self.full_audio_path = None
+        self.single_audio_path = None
+        self._base_full_audio_path = None
+        self._update_buttons()
+
+        current_voice = VOICE_DICT.get(self.selected_voice_ui, VOICE_DICT["Mandarin Female (Xiaoyi)"])
+        current_speed = int(self.speed_percent)
+        name = os.path.basename(file_path)
+
+        def _on_progress(index: int, title: Optional[str], done: int, fraction: float, window: List[str]):
+            if scope.cancelled:
+                return
+            self.sentences = window
+            self._on_sentences_ready(window)
+            self._on_status(f"Status: Processing Book: {name} {fraction:.0%} "
+                            f"Chapter {index} {title or ''} ({done} sentences)")
+
+        def _work():
+            try:
+                self._on_status(f"Status: Processing Book: {name} Reading...")
+                result = synthesize_document(self.tts_engine, file_path, current_voice, current_speed,
+                                             output_dir, scope=scope, on_progress=_on_progress)
+                if scope.cancelled:
+                    return
+                if isinstance(result, str):
+                    raise Exception(result)
+                self._on_status(f"Status: Ready Book: {len(result)} chapter files in {output_dir}")
+            except Exception as e:
+                if not scope.cancelled:
+                    self._on_status(f"Status: Error Book: {name} {e}")
+            finally:
+                self.is_processing = False
+                self._update_buttons()
+
+        threading.Thread(target=_work, daemon=True).start()
+
+    def clear_cache(self):
+        """清空音频缓存 (后台线程执行); 进行中的合成任务先被取消。"""
+        if self.is_processing:
+            self._on_status("Status: Processing Please wait for tasks to finish...")
+            return
+        self._renew_scope("clear_cache")
+        self._cancel_speculation()
+        self.stop_audio()
+        self.full_audio_path = None
+        self.single_audio_path = None
+        self._base_full_audio_path = None
+        self._last_render = None
+        self._update_buttons()
+
+        def _work():
+            if self.tts_engine.clear_cache():
+                self._on_status("Status: Ready Audio cache cleared")
+            else:
+                # 共享缓存仍被其他实例使用时不会清空
+                self._on_status("Status: Error Audio cache not cleared (in use by other instances)")
+
+        threading.Thread(target=_work, daemon=True).start()
+
+    def cancel_processing(self):
+        """取消当前的合成任务 (包括长文档模式)。"""
+        self._renew_scope("cancel")
+        self._on_status("Status: Ready Processing cancelled")
+        self._update_buttons()
+
     # ---------------- Single sentence -----------------
     def generate_single_sentence(self, sentence: str, idx: int):
-        if self.is_batch_processing or self.is_processing:
+        # 后台预缓存进行中也可直接播放: 单句请求以交互优先级插队
+        if self.is_processing:
             self._on_status("Status: Processing Please wait for tasks to finish...")
             return
         if not sentence:
@@ -232,13 +610,25 @@ class AppController:
         self.repeat_mode = 'single'
         self._on_mode_change(self.repeat_mode)
         self._on_status(f"Status: Processing Play Type: Single Sentence Generating audio... (Voice: {self.selected_voice_ui})")
+        scope = self._scope
 
         def _work():
             try:
                 current_voice = VOICE_DICT.get(self.selected_voice_ui, VOICE_DICT["Mandarin Female (Xiaoyi)"])
-                current_speed = int(self.speed_percent)
-                audio_path = self.tts_engine.generate_single_sentence_audio(
-                    self.selected_single_text, current_voice, current_speed)
+                current_speed = self._synthesis_speed()
+                target_speed = int(self.speed_percent)
+                full_path = self._base_full_audio_path if self.local_speed else self.full_audio_path
+                audio_path = None
+                if self.slice_sentences_from_full and full_path:
+                    # 从已渲染的整段音频中切出该句, 无需网络请求
+                    audio_path = self.tts_engine.slice_sentence_from_full(
+                        full_path, idx, self.selected_single_text, current_voice, current_speed)
+                if not audio_path:
+                    audio_path = self.tts_engine.generate_single_sentence_audio(
+                        self.selected_single_text, current_voice, current_speed, scope=scope)
+                audio_path = self._apply_local_speed(audio_path, target_speed)
+                if scope.cancelled:
+                    return
                 if str(audio_path).startswith("Error"):
                     raise Exception(audio_path)
                 self.single_audio_path = audio_path
@@ -250,15 +640,89 @@ class AppController:
                 self._update_buttons()
         threading.Thread(target=_work, daemon=True).start()
 
+    # ---------------- Search & replay -----------------
+    def search_cached(self, query: str, limit: int = 50, current_voice_only: bool = False) -> List[SearchHit]:
+        """
+        在所有已缓存的句子/整段文本 (含缓存包) 中按子串搜索, 不触发任何合成。
+        current_voice_only=True 时只返回当前发音人与语速的结果。
+        结果按匹配程度排序, 可直接交给 play_cached 播放。
+        """
+        voice = rate = None
+        if current_voice_only:
+            voice = VOICE_DICT.get(self.selected_voice_ui, VOICE_DICT["Mandarin Female (Xiaoyi)"])
+            rate = self._synthesis_speed()
+        return self.tts_engine.search_cached(query, limit=limit, voice=voice, rate=rate)
+
+    def play_cached(self, hit: SearchHit):
+        """播放一条搜索结果: 直接使用缓存中的音频 (单句或整段), 不调用 generate_full_audio。"""
+        if self.is_processing:
+            self._on_status("Status: Processing Please wait for tasks to finish...")
+            return
+        if not self.tts_engine.is_cached(hit.path):
+            self._on_status("Status: Error Audio no longer in cache")
+            return
+        self.stop_audio()
+        if hit.kind == 'single':
+            self.single_audio_path = hit.path
+            self.selected_single_text = hit.text
+            self.selected_single_idx = -1
+            self.repeat_mode = 'single'
+        else:
+            self.full_audio_path = hit.path
+            self._base_full_audio_path = None
+            self.sentences = self.tts_engine.text_to_sentences(hit.text)
+            self._on_sentences_ready(self.sentences)
+            self.repeat_mode = 'full'
+        self._on_mode_change(self.repeat_mode)
+        voice_ui = next((k for k, v in VOICE_DICT.items() if v == hit.voice), hit.voice)
+        self._on_status(f"Status: Ready Replaying cached audio (Voice: {voice_ui}, Speed: {hit.rate:+d}%)")
+        self.play_audio()
+
     # ---------------- Playback -----------------
     def play_audio(self, skip_warning: bool=False):
         mode = self.repeat_mode
         audio_path = self.full_audio_path if mode == 'full' else self.single_audio_path
-        if not audio_path or not os.path.exists(audio_path):
+        packed = bool(audio_path) and self.tts_engine.is_packed(audio_path)
+        # 只存在于缓存包中的音频播放包内文件
+        source = self.tts_engine.audio_source(audio_path) if audio_path and not packed else audio_path
+        if not audio_path or not (packed or os.path.exists(source)):
             if not skip_warning:
                 self._on_status(f"Status: Error Audio not found for {mode}")
             return
-        
+        if packed:
+            # 打包存储中的音频没有独立文件, 以文件对象交给播放器
+            start = lambda **kwargs: self.player.play_stream(self.tts_engine.open_audio(audio_path), **kwargs)
+        else:
+            start = lambda **kwargs: self.player.play(source, **kwargs)
+        if not self._start_playback(mode, start):
+            self._on_status(f"Status: Error Failed to load audio for {mode}")
+
+    def _play_stream(self, buffer) -> bool:
+        """从仍在合成的整段音频流开始播放; 播放器不支持流式加载时返回 False。"""
+        return self._start_playback(
+            'full', lambda **kwargs: self.player.play_stream(buffer.open_reader(), **kwargs))
+
+    def _play_sequence(self, futures) -> bool:
+        """按顺序播放逐句合成结果; 每句在其合成完成后立即播放。"""
+        def _resolver(future):
+            def _resolve():
+                try:
+                    result = future.result()
+                except concurrent.futures.CancelledError:
+                    return None
+                if not result.ok:
+                    return None
+                if self.tts_engine.is_packed(result.path):
+                    return self.tts_engine.open_audio(result.path)
+                return self.tts_engine.audio_source(result.path)
+            return _resolve
+
+        items = [_resolver(f) for f in futures]
+        return self._start_playback(
+            'full', lambda **kwargs: self.player.play_sequence(items, **kwargs))
+
+    def _start_playback(self, mode: str, start: Callable[..., bool]) -> bool:
+        """play_audio / _play_stream / _play_sequence 共用: 设置状态、回调并启动播放器。"""
         def on_playback_complete():
             self.is_playing = False
             self.is_paused = False
@@ -269,18 +733,22 @@ class AppController:
         
         self.is_paused = False
         self.is_playing = True
-        self.player.play(
-            audio_path,
+        started = start(
             repeat_count=(-1 if self.infinite_loop else self.repeat_count),
             interval_ms=self.interval_ms,
             on_complete=on_playback_complete
         )
+        if started is False:
+            self.is_playing = False
+            self._update_buttons()
+            return False
         self._on_status(
             f"Status: Playing Play Type: {'Full Text' if mode=='full' else 'Single Sentence'} "
             f"Voice: {self.selected_voice_ui} "
             f"Repeat: {'Infinite' if self.infinite_loop else self.repeat_count} | Interval: {self.interval_ms}ms"
         )
-        self._update_buttons()    
+        self._update_buttons()
+        return True
 
     def pause_audio(self):
         if not self.is_playing or self.is_paused:
@@ -309,12 +777,22 @@ class AppController:
         self._update_buttons()
 
     # ---------------- internal -----------------
+    def _renew_scope(self, name: str):
+        """取消当前配置下所有排队/进行中的合成任务, 并为新配置创建作用域。"""
+        cancelled = self._scope.cancel()
+        if cancelled:
+            print(f"[Controller] Cancelled {cancelled} obsolete synthesis task(s) ({self._scope.name})")
+        self._scope = self.tts_engine.new_scope(name)
+        self.is_batch_processing = False
+        return self._scope
+
     def _update_buttons(self):
+        # 查询缓存索引 (内存), 不再每次刷新按钮都访问文件系统
         has_audio = False
         if self.repeat_mode == 'full':
-            has_audio = bool(self.full_audio_path and os.path.exists(self.full_audio_path))
+            has_audio = self.tts_engine.is_cached(self.full_audio_path)
         else:
-            has_audio = bool(self.single_audio_path and os.path.exists(self.single_audio_path))
+            has_audio = self.tts_engine.is_cached(self.single_audio_path)
         play_enabled = has_audio and (not self.is_playing or self.is_paused)
         pause_enabled = self.is_playing and not self.is_paused
         stop_enabled = self.is_playing
@@ -0,0 +1,151 @@
+# -*- coding:utf-8 -*-
+"""
+Size budget for the persistent audio cache.
+
+The cache directory is kept across restarts. Its total size is held under a
+byte budget by evicting the least recently used entries. Sizes and last
+access times come from the cache manifest (see cache_manifest), so no
+directory scan is needed; an evicted audio file takes its sidecars of the same
+stem (the sentence index, full_x.json) with it. Eviction runs on a background
+thread at startup and again after new audio was written, at most once per
+EVICT_INTERVAL_S, so neither startup nor synthesis waits for it.
+
+Entries used within the last GRACE_S seconds are never evicted (they may be
+playing or being joined), and neither are job journals, the manifest itself
+or files still being written (.part). Temporary files left behind by a crashed
+writer are removed by sweep_partials once they are PARTIAL_MAX_AGE_S old.
+"""
+import os
+import shutil
+import threading
+import time
+
+from .sentence_index import index_path_for
+
+# Default budget for the audio cache (bytes)
+CACHE_BUDGET_BYTES = 1024 * 1024 * 1024
+# Eviction stops once the cache is below this share of the budget
+LOW_WATER = 0.9
+# Minimum seconds between two eviction scans triggered by writes
+EVICT_INTERVAL_S = 30.0
+# Entries used this recently are kept even when over budget
+GRACE_S = 600.0
+# Unchanged .part files older than this belong to a writer that died
+PARTIAL_MAX_AGE_S = 3600.0
+
+
+class CacheBudget:
+    """Keeps the cache described by manifest under max_bytes (0 = unlimited) by LRU eviction."""
+    def __init__(self, manifest, max_bytes=CACHE_BUDGET_BYTES, on_evict=None):
+        self.manifest = manifest
+        self.cache_dir = manifest.cache_dir
+        self.max_bytes = max(0, int(max_bytes))
+        # Called with the path of every evicted entry (e.g. to drop it from the packed store)
+        self.on_evict = on_evict
+        self.total_bytes = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._last_scan = 0.0
+
+    def request_eviction(self, force=False):
+        """
+        Starts a background eviction pass unless one is running or (without force)
+        the last one was less than EVICT_INTERVAL_S ago.
+        """
+        if not self.max_bytes:
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if not force and time.monotonic() - self._last_scan < EVICT_INTERVAL_S:
+                return
+            self._last_scan = time.monotonic()
+            self._thread = threading.Thread(target=self.evict, name="AudioCacheEviction", daemon=True)
+            self._thread.start()
+
+    def evict(self):
+        """
+        Deletes least recently used entries until the cache is below
+        LOW_WATER * max_bytes. Runs synchronously.
+
+        Returns:
+            int: Bytes freed.
+        """
+        if not self.max_bytes:
+            return 0
+        entries = self.manifest.entries()
+        total = sum(e.size for e in entries)
+        self.total_bytes = total
+        if total <= self.max_bytes:
+            return 0
+
+        target = self.max_bytes * LOW_WATER
+        cutoff = time.time() - GRACE_S
+        freed = removed = 0
+        for entry in sorted(entries, key=lambda e: e.last_access):
+            if total - freed <= target or entry.last_access > cutoff:
+                break
+            path = os.path.join(self.cache_dir, entry.name)
+            self.manifest.discard(path)
+            for victim in (path, index_path_for(path)):
+                try:
+                    os.unlink(victim)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    print(f"Warning: Failed to evict {victim}: {e}")
+            if self.on_evict is not None:
+                self.on_evict(path)
+            freed += entry.size
+            removed += 1
+        self.total_bytes = total - freed
+        print(f"Audio cache: evicted {removed} entries ({freed / 1048576:.1f} MiB), "
+              f"{self.total_bytes / 1048576:.1f} of {self.max_bytes / 1048576:.0f} MiB used")
+        return freed
+
+    def sweep_partials(self):
+        """
+        Deletes temporary files (.part) in the cache directory that have not been
+        written to for PARTIAL_MAX_AGE_S.
+
+        Returns:
+            int: Number of files removed.
+        """
+        cutoff = time.time() - PARTIAL_MAX_AGE_S
+        removed = 0
+        try:
+            with os.scandir(self.cache_dir) as it:
+                stale = [item.path for item in it
+                         if item.name.endswith(".part") and item.stat(follow_symlinks=False).st_mtime < cutoff]
+        except OSError as e:
+            print(f"Warning: Failed to scan audio cache {self.cache_dir}: {e}")
+            return 0
+        for path in stale:
+            try:
+                os.unlink(path)
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+    def clear(self, keep=()):
+        """
+        Deletes every cached file (and subdirectory), keeping the directory, the
+        manifest and the entries named in keep.
+        """
+        self.manifest.clear()
+        if not os.path.exists(self.cache_dir):
+            return
+        manifest_name = os.path.basename(self.manifest.path)
+        for filename in os.listdir(self.cache_dir):
+            if filename.startswith(manifest_name) or filename in keep:
+                continue
+            file_path = os.path.join(self.cache_dir, filename)
+            try:
+                if os.path.isfile(file_path):
+                    os.unlink(file_path)
+                elif os.path.isdir(file_path):
+                    shutil.rmtree(file_path)
+            except Exception as e:
+                print(f"Warning: Failed to delete {file_path}: {e}")
+        self.total_bytes = 0
@@ -0,0 +1,138 @@
+# -*- coding:utf-8 -*-
+"""
+Growing in-memory audio buffer for progressive playback.
+
+The synthesis side appends MP3 chunks from edge-tts as they arrive; players read
+through GrowingAudioReader, a file-like object whose reads block until enough
+data is available, so playback can start long before the render has finished.
+"""
+import io
+import threading
+
+# edge-tts default output is 48 kbit/s MP3 (6000 bytes/s): ~300 ms of audio
+PREROLL_BYTES = 1800
+# Length reported for a stream that is still growing (~46 hours at 48 kbit/s)
+OPEN_STREAM_SIZE = 1 << 30
+# Bytes at the end of OPEN_STREAM_SIZE that read as zeros (tag probes)
+TAG_PROBE_BYTES = 4096
+
+
+class GrowingAudioBuffer:
+    """
+    Thread-safe append-only byte buffer filled by one producer.
+
+    States: open (still receiving) -> finished (path of the complete file known)
+    or failed (error stored). Readers see the bytes appended so far and block for more.
+    """
+    def __init__(self):
+        self._data = bytearray()
+        self._cond = threading.Condition()
+        self.finished = False
+        self.error = None
+        self.path = None
+
+    @property
+    def size(self):
+        with self._cond:
+            return len(self._data)
+
+    @property
+    def done(self):
+        return self.finished or self.error is not None
+
+    def append(self, chunk):
+        with self._cond:
+            self._data.extend(chunk)
+            self._cond.notify_all()
+
+    def finish(self, path=None):
+        """Marks the stream complete; path is the cached file holding the same bytes."""
+        with self._cond:
+            self.finished = True
+            self.path = path
+            self._cond.notify_all()
+
+    def fail(self, error):
+        with self._cond:
+            self.error = error
+            self._cond.notify_all()
+
+    def wait_for(self, nbytes, timeout=None):
+        """
+        Blocks until at least nbytes are buffered or the stream ended.
+
+        Returns:
+            bool: True if nbytes are available (or the complete stream is shorter
+            but finished successfully), False on failure or timeout.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: len(self._data) >= nbytes or self.done, timeout)
+            if self.error is not None:
+                return False
+            return len(self._data) >= nbytes or (self.finished and len(self._data) > 0)
+
+    def read_at(self, pos, size):
+        """Reads up to size bytes from pos, blocking until they exist or the stream ended."""
+        with self._cond:
+            self._cond.wait_for(lambda: len(self._data) >= pos + size or self.done)
+            if self.error is not None:
+                raise IOError(f"Audio stream failed: {self.error}")
+            return bytes(self._data[pos:pos + size])
+
+    def wait_complete(self, timeout=None):
+        """Blocks until the stream ended; returns the final size (raises on failure)."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.done, timeout)
+            if self.error is not None:
+                raise IOError(f"Audio stream failed: {self.error}")
+            return len(self._data)
+
+    def open_reader(self):
+        return GrowingAudioReader(self)
+
+
+class GrowingAudioReader(io.RawIOBase):
+    """
+    Independent, seekable read cursor over a GrowingAudioBuffer.
+    Decoders probe the end when they open a stream (size, ID3v1/APE tags) and
+    stop reading at the size they saw. While the stream is still growing it
+    therefore reports OPEN_STREAM_SIZE, far beyond any render, and returns zeros
+    for reads near that end (no tags) instead of waiting for the render to
+    complete; playback ends at the real end of the stream.
+    """
+    def __init__(self, buffer):
+        super().__init__()
+        self._buffer = buffer
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            end = self._buffer.wait_complete() if self._buffer.done else OPEN_STREAM_SIZE
+            self._pos = end + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        self._pos = max(0, self._pos)
+        return self._pos
+
+    def readinto(self, b):
+        if self._pos >= OPEN_STREAM_SIZE - TAG_PROBE_BYTES and not self._buffer.done:
+            data = bytes(min(len(b), max(0, OPEN_STREAM_SIZE - self._pos)))
+        else:
+            data = self._buffer.read_at(self._pos, len(b))
+        n = len(data)
+        b[:n] = data
+        self._pos += n
+        return n
@@ -0,0 +1,122 @@
+# -*- coding:utf-8 -*-
+"""
+Append-only journals for resumable batch jobs.
+
+A journal is a JSONL file. The first line is a header identifying the job
+(voice, rate, a key over the input, ...); every further line is one event,
+e.g. the planned units, a completed unit or a failure with its attempt count.
+Events are flushed as they are written, so after a crash, a closed app or a
+dropped network the journal describes the job up to its last finished step
+and the next run continues from there.
+
+A torn last line (write interrupted) is dropped when the journal is opened.
+A journal whose header does not match the job being started belongs to other
+input and is started over.
+"""
+import hashlib
+import json
+import os
+import threading
+
+
+def job_key(*parts):
+    """Stable short hex key over JSON-serializable job parts."""
+    data = json.dumps(parts, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()[:16]
+
+
+class BatchJournal:
+    """
+    Journal of one job. events(name) returns the recorded events of that kind
+    (dicts), oldest first; append() records a new one. Thread-safe.
+    """
+    def __init__(self, path, header):
+        self.path = path
+        self.header = dict(header)
+        self._records = []
+        self._lock = threading.Lock()
+        self._fp = None
+        self.resumed = self._load()
+        self._started = self.resumed
+
+    def _load(self):
+        """Reads an existing journal; returns True if it belongs to this job."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as fp:
+                lines = fp.read().split("\n")
+        except FileNotFoundError:
+            return False
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"Warning: Ignoring unreadable job journal {self.path}: {e}")
+            return False
+
+        records = []
+        for line in lines:
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # Only the last line can be torn; stop at the first bad one
+                break
+        if not records or records[0] != {"event": "header", **self.header}:
+            return False
+        self._records = records[1:]
+        if len(records) != sum(1 for line in lines if line):
+            # Rewrite without the torn tail so appended events start on a clean line
+            self._rewrite()
+        return True
+
+    def _rewrite(self):
+        tmp_path = f"{self.path}.part"
+        with open(tmp_path, "w", encoding="utf-8") as fp:
+            for record in [{"event": "header", **self.header}] + self._records:
+                fp.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def _open(self):
+        if self._fp is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            if not self._started:
+                # New job (or a stale journal of different input): start the file over
+                self._rewrite()
+                self._started = True
+            self._fp = open(self.path, "a", encoding="utf-8")
+        return self._fp
+
+    def events(self, name):
+        with self._lock:
+            return [r for r in self._records if r.get("event") == name]
+
+    def last(self, name):
+        """The most recent event of that kind, or None."""
+        events = self.events(name)
+        return events[-1] if events else None
+
+    def append(self, name, **fields):
+        record = {"event": name, **fields}
+        with self._lock:
+            try:
+                fp = self._open()
+                fp.write(json.dumps(record, ensure_ascii=False) + "\n")
+                fp.flush()
+            except OSError as e:
+                # Losing a journal entry only costs redoing that step after a restart
+                print(f"Warning: Failed to write job journal {self.path}: {e}")
+            self._records.append(record)
+
+    def close(self):
+        with self._lock:
+            if self._fp is not None:
+                self._fp.close()
+                self._fp = None
+
+    def remove(self):
+        """Closes and deletes the journal (the job is complete)."""
+        self.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Warning: Failed to remove job journal {self.path}: {e}")
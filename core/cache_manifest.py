@@ -0,0 +1,316 @@
+# -*- coding:utf-8 -*-
+"""
+In-memory index of the audio cache, persisted in SQLite.
+
+Every audio file in the cache has one row keyed by its file name, which
+encodes (kind, voice, rate, text hash) as produced by
+TTSEngine._get_audio_file_path. A row also carries size, duration (when known),
+creation time, last access, hit count and, for entries written by this
+version, the text. The full table is loaded into a dict at startup, so cache
+lookups and batch pre-checks are dictionary operations instead of one
+filesystem probe per file. Changes are written back in batches
+(FLUSH_DELAY_S after the first change, and on close).
+
+reconcile() brings the index in line with the directory (files added or
+deleted while the app was not running, or a cache from before the index
+existed). It runs in the background at startup; until it has finished,
+lookups that miss fall back to the filesystem.
+
+With shared=True the directory is used by several processes (see
+shared_cache). Misses always fall back to the filesystem, so a file another
+instance has just published is found right away, and refresh() reloads the
+table when another process has committed changes (its evictions, its hits).
+The database then uses a rollback journal instead of WAL, which needs shared
+memory that network file systems do not provide.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+MANIFEST_NAME = "manifest.sqlite3"
+# Seconds between the first unsaved change and writing it to the database
+FLUSH_DELAY_S = 2.0
+# File types that are cache entries (sentence indexes and .part files are not)
+AUDIO_EXTENSIONS = (".mp3", ".wav")
+
+_COLUMNS = ("name", "kind", "voice", "rate", "text_hash", "size", "duration_ms",
+            "created", "last_access", "hits", "text")
+
+
+def parse_cache_name(name):
+    """
+    Splits a cache file name into (kind, voice, rate, text_hash):
+    single_zh_CN_XiaoyiNeural_0_<sha1>.mp3 -> ("single", "zh_CN_XiaoyiNeural", "0", "<sha1>").
+    Stretched renders (stretch_+20_<base>.wav) are kind "stretch" with their playback rate.
+
+    Returns:
+        tuple or None if the name does not follow the cache naming scheme.
+    """
+    stem = os.path.splitext(name)[0]
+    stretch_rate = None
+    if stem.startswith("stretch_"):
+        _, stretch_rate, stem = stem.split("_", 2) if stem.count("_") >= 2 else (None, None, "")
+    parts = stem.split("_")
+    if len(parts) < 4:
+        return None
+    kind, voice, rate, text_hash = parts[0], "_".join(parts[1:-2]), parts[-2], parts[-1]
+    if stretch_rate is not None:
+        kind, rate = "stretch", stretch_rate
+    return kind, voice, rate, text_hash
+
+
+class CacheEntry:
+    """One cached audio file."""
+    __slots__ = _COLUMNS
+
+    def __init__(self, name, kind, voice, rate, text_hash, size=0, duration_ms=None,
+                 created=0.0, last_access=0.0, hits=0, text=None):
+        self.name = name
+        self.kind = kind
+        self.voice = voice
+        self.rate = rate
+        self.text_hash = text_hash
+        self.size = size
+        self.duration_ms = duration_ms
+        self.created = created
+        self.last_access = last_access
+        self.hits = hits
+        self.text = text
+
+    def row(self):
+        return tuple(getattr(self, c) for c in _COLUMNS)
+
+
+class CacheManifest:
+    """Index of one cache directory. Thread-safe; lookups never touch the disk."""
+    def __init__(self, cache_dir, name=MANIFEST_NAME, shared=False):
+        self.cache_dir = cache_dir
+        self.shared = shared
+        self.path = os.path.join(cache_dir, name)
+        self._lock = threading.RLock()
+        self._entries = {}
+        # name -> CacheEntry to write, or None to delete
+        self._dirty = {}
+        # Callbacks (name, CacheEntry or None) for every change; (None, None) when all entries were replaced
+        self._listeners = []
+        self._flush_timer = None
+        self.reconciled = False
+        self._db = None
+        # PRAGMA data_version as of the last read; it changes when another process commits
+        self._data_version = None
+        try:
+            # The timeout waits out another process's write transaction
+            self._db = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=DELETE" if shared else "PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(f"CREATE TABLE IF NOT EXISTS entries ({_COLUMNS[0]} TEXT PRIMARY KEY, "
+                             f"{', '.join(_COLUMNS[1:])})")
+            self._entries = self._read_entries()
+        except sqlite3.Error as e:
+            # Without the database the index still works for this session (rebuilt by reconcile)
+            print(f"Warning: Cache manifest unavailable ({self.path}): {e}")
+            self._db = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _read_entries(self):
+        self._data_version = self._db.execute("PRAGMA data_version").fetchone()[0]
+        return {row[0]: CacheEntry(*row)
+                for row in self._db.execute(f"SELECT {', '.join(_COLUMNS)} FROM entries")}
+
+    # --- Lookups ---
+    def contains(self, path):
+        """True if the cache file at path exists (in-memory; see reconcile for the fallback)."""
+        name = os.path.basename(path)
+        if name in self._entries:
+            return True
+        if (self.shared or not self.reconciled) and os.path.exists(path):
+            self.add(path, discovered=True)
+            return True
+        return False
+
+    def present(self, paths):
+        """Bulk form of contains(): the subset of paths that are cached."""
+        return {p for p in paths if self.contains(p)}
+
+    def get(self, path):
+        """The CacheEntry for path, or None."""
+        return self._entries.get(os.path.basename(path))
+
+    def entries(self):
+        """Snapshot of all entries."""
+        with self._lock:
+            return list(self._entries.values())
+
+    @property
+    def total_bytes(self):
+        return sum(e.size for e in self._entries.values())
+
+    def subscribe(self, callback):
+        """
+        Calls callback(name, entry) after every added, updated (hit) or discarded
+        (entry None) entry, and callback(None, None) after clear() or a reload
+        by refresh(). Callbacks run on the changing thread and must be quick.
+        """
+        self._listeners.append(callback)
+
+    def _notify(self, name, entry):
+        for callback in self._listeners:
+            try:
+                callback(name, entry)
+            except Exception as e:
+                print(f"Warning: Cache manifest listener failed: {e}")
+
+    # --- Updates ---
+    def add(self, path, duration_ms=None, text=None, discovered=False, size=None):
+        """
+        Records a file that was just written to the cache (replacing any old entry).
+        discovered=True: an existing file found on disk; its modification time
+        stands in for the last access. With size given the entry is not a file
+        of its own (e.g. a segment in the packed store) and is not stat'ed.
+        """
+        name = os.path.basename(path)
+        key = parse_cache_name(name)
+        if key is None or not name.endswith(AUDIO_EXTENSIONS):
+            return None
+        if size is None:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return None
+            size, created = stat.st_size, stat.st_mtime
+        else:
+            created = time.time()
+        with self._lock:
+            old = self._entries.get(name)
+            entry = CacheEntry(name, *key, size=size, duration_ms=duration_ms,
+                               created=created,
+                               last_access=created if discovered else time.time(),
+                               hits=old.hits if old else 0,
+                               text=text if text is not None else (old.text if old else None))
+            self._entries[name] = entry
+            self._mark(name, entry)
+        return entry
+
+    def hit(self, path):
+        """Counts a cache hit on path and refreshes its last access time."""
+        name = os.path.basename(path)
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return
+            entry.hits += 1
+            entry.last_access = time.time()
+            self._mark(name, entry)
+
+    def discard(self, path):
+        """Forgets a file that was deleted from the cache."""
+        name = os.path.basename(path)
+        with self._lock:
+            if self._entries.pop(name, None) is not None:
+                self._mark(name, None)
+
+    def clear(self):
+        with self._lock:
+            for name in self._entries:
+                self._dirty[name] = None
+            self._entries.clear()
+        self.flush()
+        self._notify(None, None)
+
+    def reconcile(self, keep=None):
+        """
+        Adds audio files the index does not know and drops entries whose file is
+        gone, unless keep(path) is true (entries stored elsewhere, e.g. in packs).
+        Runs synchronously (the engine calls it from a background thread).
+
+        Returns:
+            tuple: (added, removed)
+        """
+        try:
+            with os.scandir(self.cache_dir) as it:
+                on_disk = {item.name: item.path for item in it
+                           if item.name.endswith(AUDIO_EXTENSIONS) and item.is_file(follow_symlinks=False)}
+        except OSError as e:
+            print(f"Warning: Failed to scan audio cache {self.cache_dir}: {e}")
+            return 0, 0
+        with self._lock:
+            known = set(self._entries)
+        added = sum(1 for name, path in on_disk.items() if name not in known and self.add(path, discovered=True))
+        removed = 0
+        for name in known - on_disk.keys():
+            if keep is not None and keep(os.path.join(self.cache_dir, name)):
+                continue
+            self.discard(name)
+            removed += 1
+        self.reconciled = True
+        if added or removed:
+            print(f"Cache manifest: {len(self._entries)} entries (+{added} found, -{removed} missing)")
+        return added, removed
+
+    def refresh(self):
+        """
+        Reloads the table if another process committed since it was last read
+        (shared mode). Changes of this process not yet flushed are kept.
+
+        Returns:
+            bool: True if the table was reloaded.
+        """
+        with self._lock:
+            if self._db is None:
+                return False
+            try:
+                if self._db.execute("PRAGMA data_version").fetchone()[0] == self._data_version:
+                    return False
+                entries = self._read_entries()
+            except sqlite3.Error as e:
+                print(f"Warning: Failed to refresh cache manifest: {e}")
+                return False
+            for name, entry in self._dirty.items():
+                if entry is None:
+                    entries.pop(name, None)
+                else:
+                    entries[name] = entry
+            self._entries = entries
+        self._notify(None, None)
+        return True
+
+    # --- Persistence ---
+    def _mark(self, name, entry):
+        self._dirty[name] = entry
+        self._notify(name, entry)
+        if self._db is not None and self._flush_timer is None:
+            self._flush_timer = threading.Timer(FLUSH_DELAY_S, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def flush(self):
+        """Writes pending changes to the database."""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            dirty, self._dirty = self._dirty, {}
+            if self._db is None or not dirty:
+                return
+            upserts = [e.row() for e in dirty.values() if e is not None]
+            deletes = [(name,) for name, e in dirty.items() if e is None]
+            try:
+                with self._db:
+                    if deletes:
+                        self._db.executemany("DELETE FROM entries WHERE name = ?", deletes)
+                    if upserts:
+                        self._db.executemany(
+                            f"INSERT OR REPLACE INTO entries ({', '.join(_COLUMNS)}) "
+                            f"VALUES ({', '.join('?' * len(_COLUMNS))})", upserts)
+            except sqlite3.Error as e:
+                print(f"Warning: Failed to save cache manifest: {e}")
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
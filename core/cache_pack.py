@@ -0,0 +1,195 @@
+# -*- coding:utf-8 -*-
+"""
+Distributable, read-only cache packs.
+
+A pack is a directory <name>-<version>/ with audio files under their cache
+names (as produced by TTSEngine._get_audio_file_path) and a pack.json:
+
+    {"format": 1, "name": "hsk1", "version": "2", "created": 1700000000,
+     "complete": true, "voices": [...], "rates": [...],
+     "entries": [{"name": "single_...mp3", "voice": ..., "rate": ..., "text": ...,
+                  "size": ..., "duration_ms": ...}, ...]}
+
+Packs are built ahead of time by the pre-warm job (see prewarm) into
+<name>-<version>.building/ and renamed into place once complete, so a
+half-built pack is never mounted. The engine mounts the packs found in its
+pack directories at startup (CachePacks): a lookup that misses the cache is
+answered from the newest version of any pack holding that entry. The app
+never writes, evicts or clears pack files.
+"""
+import json
+import os
+import re
+import shutil
+import time
+
+from .shared_cache import partial_path
+
+# Layout version of pack.json; packs of other formats are not mounted
+PACK_FORMAT = 1
+PACK_MANIFEST = "pack.json"
+# Default directory for packs, next to the audio cache
+CACHE_PACKS_DIR = "cache_packs"
+BUILDING_SUFFIX = ".building"
+
+_UNSAFE_NAME_RE = re.compile(r"[^\w.-]+")
+
+
+def pack_dirname(name, version):
+    return _UNSAFE_NAME_RE.sub("_", f"{name}-{version}")
+
+
+def version_key(version):
+    """Sort key for pack versions: "1.10" is newer than "1.9"."""
+    return tuple((0, int(part), "") if part.isdigit() else (1, 0, part)
+                 for part in re.split(r"[.\-_]", str(version)))
+
+
+def read_pack_manifest(pack_dir):
+    """The parsed pack.json of pack_dir, or None if it is missing, unreadable or of another format."""
+    try:
+        with open(os.path.join(pack_dir, PACK_MANIFEST), "r", encoding="utf-8") as fp:
+            manifest = json.load(fp)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"Warning: Ignoring unreadable cache pack {pack_dir}: {e}")
+        return None
+    if manifest.get("format") != PACK_FORMAT:
+        print(f"Warning: Ignoring cache pack {pack_dir} (format {manifest.get('format')}, "
+              f"expected {PACK_FORMAT})")
+        return None
+    return manifest
+
+
+class PackBuilder:
+    """
+    Writes one pack version. Entries are staged in <pack>.building/ and
+    save() records them, so an interrupted build continues from the staged
+    files; publish() moves the finished pack into place.
+    """
+    def __init__(self, output_dir, name, version, voices=(), rates=()):
+        self.name = name
+        self.version = str(version)
+        self.path = os.path.join(output_dir, pack_dirname(name, version))
+        self.staging = self.path + BUILDING_SUFFIX
+        if os.path.exists(self.path):
+            raise FileExistsError(f"Cache pack {self.path} already exists; build a new version")
+        os.makedirs(self.staging, exist_ok=True)
+        self.voices = list(voices)
+        self.rates = list(rates)
+        staged = read_pack_manifest(self.staging) or {}
+        # Entries staged by an earlier, interrupted build whose file is still there
+        self._entries = {e["name"]: e for e in staged.get("entries", ())
+                         if os.path.exists(os.path.join(self.staging, e["name"]))}
+        self._created = staged.get("created") or int(time.time())
+
+    def __len__(self):
+        return len(self._entries)
+
+    def has(self, cache_name):
+        return cache_name in self._entries
+
+    def add(self, cache_path, source, voice, rate, text, duration_ms=None):
+        """
+        Stages the audio of one cache entry. source is a file path or the audio
+        data (bytes or memoryview, e.g. TTSEngine.audio_source).
+        """
+        name = os.path.basename(cache_path)
+        target = os.path.join(self.staging, name)
+        tmp_path = partial_path(target)
+        try:
+            if isinstance(source, str):
+                shutil.copyfile(source, tmp_path)
+            else:
+                with open(tmp_path, "wb") as fp:
+                    fp.write(source)
+            os.replace(tmp_path, target)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        self._entries[name] = {"name": name, "voice": voice, "rate": rate, "text": text,
+                               "size": os.path.getsize(target), "duration_ms": duration_ms}
+
+    def save(self, complete=False):
+        """Writes pack.json into the staging directory."""
+        manifest = {"format": PACK_FORMAT, "name": self.name, "version": self.version,
+                    "created": self._created, "complete": complete,
+                    "voices": self.voices, "rates": self.rates,
+                    "entries": list(self._entries.values())}
+        path = os.path.join(self.staging, PACK_MANIFEST)
+        tmp_path = partial_path(path)
+        with open(tmp_path, "w", encoding="utf-8") as fp:
+            json.dump(manifest, fp, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def publish(self):
+        """
+        Marks the pack complete and moves it to its final directory.
+
+        Returns:
+            str: Path of the published pack.
+        """
+        self.save(complete=True)
+        os.replace(self.staging, self.path)
+        return self.path
+
+
+class CachePacks:
+    """
+    Read-only lookup over the packs mounted from a list of directories.
+    Each directory is a pack itself or holds packs as subdirectories. Of
+    several versions of the same pack only the newest is mounted.
+    """
+    def __init__(self, roots):
+        newest = {}
+        for pack_dir in self._discover(roots):
+            manifest = read_pack_manifest(pack_dir)
+            if manifest is None or not manifest.get("complete"):
+                continue
+            current = newest.get(manifest.get("name"))
+            if current is None or version_key(manifest.get("version")) > version_key(current[1].get("version")):
+                newest[manifest.get("name")] = (pack_dir, manifest)
+
+        # cache file name -> (absolute path, entry)
+        self._files = {}
+        self.packs = []
+        for pack_dir, manifest in newest.values():
+            for entry in manifest.get("entries", ()):
+                self._files.setdefault(entry["name"], (os.path.join(pack_dir, entry["name"]), entry))
+            self.packs.append((manifest.get("name"), manifest.get("version"), len(manifest.get("entries", ()))))
+        if self.packs:
+            print("Cache packs mounted: " + ", ".join(f"{n} v{v} ({c} entries)" for n, v, c in self.packs))
+
+    @staticmethod
+    def _discover(roots):
+        for root in roots:
+            if not root or not os.path.isdir(root):
+                continue
+            if os.path.exists(os.path.join(root, PACK_MANIFEST)):
+                yield root
+                continue
+            for name in sorted(os.listdir(root)):
+                pack_dir = os.path.join(root, name)
+                if not name.endswith(BUILDING_SUFFIX) and os.path.isfile(os.path.join(pack_dir, PACK_MANIFEST)):
+                    yield pack_dir
+
+    def __len__(self):
+        return len(self._files)
+
+    def __contains__(self, cache_path):
+        return os.path.basename(cache_path) in self._files
+
+    def path_for(self, cache_path):
+        """File holding the audio of cache_path in a mounted pack, or None."""
+        found = self._files.get(os.path.basename(cache_path))
+        return found[0] if found else None
+
+    def entry(self, cache_path):
+        """The pack.json entry of cache_path, or None."""
+        found = self._files.get(os.path.basename(cache_path))
+        return found[1] if found else None
+
+    def entries(self):
+        """(file path, entry dict) of every mounted entry."""
+        return list(self._files.values())
@@ -0,0 +1,106 @@
+# -*- coding:utf-8 -*-
+"""
+Size-balanced planning of synthesis requests.
+
+The sentence list shown to the user stays as text_to_sentences produced it;
+only the units sent to edge-tts change:
+
+- runs of short neighbouring sentences are merged into one request of up to
+  target_chars characters (split back per sentence via boundary events),
+- a sentence longer than max_chars is sub-split at clause marks (，、：) into
+  pieces of about target_chars that are synthesized in parallel and joined.
+
+Requests of similar size finish in similar time, which keeps the adaptive
+window busy instead of waiting on one run-on paragraph.
+"""
+import re
+from collections import namedtuple
+
+# Preferred characters per request
+TARGET_CHARS = 60
+# Sentences longer than this are sub-split at clause marks
+MAX_CHARS = 120
+
+CLAUSE_DELIMITERS = "，、："
+
+# indices: sentence indexes covered; pieces: sub-texts of a split sentence (None otherwise)
+SynthesisChunk = namedtuple("SynthesisChunk", ["indices", "pieces"])
+
+_CLAUSE_RE = re.compile(f"[^{CLAUSE_DELIMITERS}]+[{CLAUSE_DELIMITERS}]*|[{CLAUSE_DELIMITERS}]+")
+
+
+def split_sentence(sentence, target_chars=TARGET_CHARS, max_chars=MAX_CHARS):
+    """
+    Sub-splits an overlong sentence at clause marks, packing clauses into pieces
+    of up to target_chars. A clause longer than max_chars is cut at target_chars.
+    "".join(pieces) == sentence.
+
+    Returns:
+        list: Pieces (the sentence alone if it is not longer than max_chars).
+    """
+    if max_chars <= 0 or len(sentence) <= max_chars:
+        return [sentence]
+    target_chars = max(1, min(target_chars, max_chars)) if target_chars > 0 else max_chars
+
+    pieces = []
+    current = ""
+    for clause in _CLAUSE_RE.findall(sentence):
+        while len(clause) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(clause[:target_chars])
+            clause = clause[target_chars:]
+        if current and len(current) + len(clause) > target_chars:
+            pieces.append(current)
+            current = ""
+        current += clause
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def plan_chunks(sentences, target_chars=TARGET_CHARS, max_chars=MAX_CHARS, plannable=None):
+    """
+    Plans synthesis units for a sentence list.
+
+    Args:
+        target_chars: Merge consecutive sentences up to this many characters (0 = no merging).
+        max_chars: Sub-split sentences longer than this (0 = no splitting).
+        plannable: Optional predicate on the sentence index; sentences for which it is
+            False (cached, duplicate, already queued) get a unit of their own, placed
+            after the merged unit they interrupt so a duplicate never precedes the
+            request it waits for.
+
+    Returns:
+        list: SynthesisChunk per unit (merged units in sentence order).
+    """
+    chunks = []
+    run = []
+    run_chars = 0
+    deferred = []
+
+    def _flush():
+        if run:
+            chunks.append(SynthesisChunk(list(run), None))
+            run.clear()
+        chunks.extend(deferred)
+        deferred.clear()
+
+    for i, sentence in enumerate(sentences):
+        if plannable is not None and not plannable(i):
+            deferred.append(SynthesisChunk([i], None))
+            continue
+        pieces = split_sentence(sentence, target_chars, max_chars)
+        if len(pieces) > 1:
+            _flush()
+            chunks.append(SynthesisChunk([i], pieces))
+            continue
+        if run and (target_chars <= 0 or run_chars + len(sentence) > target_chars):
+            _flush()
+        if not run:
+            run_chars = 0
+        run.append(i)
+        run_chars += len(sentence)
+    _flush()
+    return chunks
@@ -0,0 +1,146 @@
+# -*- coding:utf-8 -*-
+"""
+Reusable outbound connections for edge-tts.
+
+edge-tts opens a new aiohttp ClientSession for every Communicate and closes it,
+together with its connector, when the stream ends, so each request pays DNS,
+TCP and TLS setup again. ConnectionManager hands every Communicate one shared
+connector that survives those sessions closing: DNS answers stay cached, and
+idle keep-alive connections opened by prewarm() are taken by the next websocket
+upgrade instead of dialling a new one. A websocket consumes its connection, so
+the warm pool is topped up in the background once it is empty, at most once
+per REPLENISH_INTERVAL_S (each top-up is a request to the edge-tts host).
+
+TLS, DNS caching and connection limits come from the shared Transport.
+
+All methods must run on the event loop that owns the connector (the engine loop).
+"""
+import asyncio
+import inspect
+from urllib.parse import urlsplit
+
+import edge_tts
+
+from .transport import aiohttp, get_transport
+
+try:
+    from edge_tts.constants import WSS_URL as _WSS_URL
+except ImportError:
+    _WSS_URL = "wss://speech.platform.bing.com/consumer/speech/synthesize/readaloud/edge/v1"
+
+EDGE_TTS_HOST = urlsplit(_WSS_URL).hostname
+
+# Idle connections kept open for the next request
+WARM_CONNECTIONS = 2
+# Minimum seconds between background top-ups of the warm pool
+REPLENISH_INTERVAL_S = 10.0
+
+# edge-tts >= 6.1.10 accepts a caller-provided aiohttp connector
+try:
+    _COMMUNICATE_SUPPORTS_CONNECTOR = "connector" in inspect.signature(edge_tts.Communicate).parameters
+except (TypeError, ValueError):
+    _COMMUNICATE_SUPPORTS_CONNECTOR = False
+
+
+class ConnectionManager:
+    """
+    Owns the shared edge-tts connector and its pool of warm connections.
+    The connector is created lazily on the running loop and recreated if the
+    engine restarts its loop.
+    """
+    def __init__(self, transport=None, host=EDGE_TTS_HOST, warm_connections=WARM_CONNECTIONS):
+        self.transport = transport or get_transport()
+        self.host = host
+        self.warm_connections = max(0, int(warm_connections))
+        self._connector = None
+        self._loop = None
+        self._warming = 0
+        self._last_replenish = None
+
+    @property
+    def available(self):
+        return aiohttp is not None and _COMMUNICATE_SUPPORTS_CONNECTOR
+
+    def _get_connector(self):
+        if not self.available:
+            return None
+        loop = asyncio.get_running_loop()
+        if self._connector is None or self._loop is not loop:
+            self._connector = self.transport.create_connector(self.host)
+            self._loop = loop
+        return self._connector
+
+    def communicate_options(self):
+        """Keyword arguments for edge_tts.Communicate that route it through the shared connector."""
+        connector = self._get_connector()
+        return {"connector": connector} if connector is not None else {}
+
+    async def prewarm(self, count=None):
+        """
+        Opens up to count idle keep-alive connections to the edge-tts host
+        (DNS lookup, TCP and TLS handshake) so the next requests skip that setup.
+
+        Returns:
+            int: Number of connections warmed.
+        """
+        connector = self._get_connector()
+        count = self.warm_connections if count is None else count
+        count = min(count, self.warm_connections - self._warming)
+        if connector is None or count <= 0:
+            return 0
+
+        self._warming += count
+        try:
+            async with aiohttp.ClientSession(connector=connector, connector_owner=False,
+                                             trust_env=True) as session:
+                results = await asyncio.gather(
+                    *(self._open_one(session) for _ in range(count)), return_exceptions=True)
+        finally:
+            self._warming -= count
+        warmed = sum(1 for r in results if r is True)
+        if warmed < count:
+            errors = [r for r in results if isinstance(r, BaseException)]
+            print(f"Warning: Pre-warmed {warmed}/{count} connections to {self.host}: {errors[:1]}")
+        return warmed
+
+    async def _open_one(self, session):
+        # Any response will do: reading it returns the connection to the pool.
+        # Same TLS context as edge-tts' websocket, so the pooled connection matches it.
+        async with session.head(f"https://{self.host}/", allow_redirects=False,
+                                ssl=self.transport.ssl_context) as response:
+            await response.read()
+        return True
+
+    def replenish(self):
+        """
+        Schedules a background prewarm after a request consumed a connection,
+        if the warm pool is empty and the last top-up is long enough ago.
+        """
+        connector = self._connector
+        if connector is None or self._warming:
+            return
+        now = asyncio.get_running_loop().time()
+        if self._last_replenish is not None and now - self._last_replenish < REPLENISH_INTERVAL_S:
+            return
+        if connector.idle_connections(self.host):
+            return
+        self._last_replenish = now
+
+        async def _top_up():
+            # Skip if the connector was closed (engine shutdown) in the meantime
+            if self._connector is connector:
+                await self.prewarm()
+
+        task = asyncio.get_running_loop().create_task(_top_up())
+        task.add_done_callback(_consume_task_error)
+
+    async def close(self):
+        """Closes the shared connector and every pooled connection."""
+        connector, self._connector, self._loop = self._connector, None, None
+        if connector is not None:
+            await connector.shutdown()
+
+
+def _consume_task_error(task):
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Warning: Connection pre-warm failed: {task.exception()}")
@@ -0,0 +1,239 @@
+# -*- coding:utf-8 -*-
+"""
+Long-document (book) mode.
+
+A text file is read incrementally, split into sections at chapter headings
+(第X章/回/节/卷, 序章, 楔子, Chapter N, ...) and each section is synthesized
+through the engine's batch path one window of sentences at a time. The audio
+of every window is appended to the section's MP3 as soon as it is ready, so
+memory holds one window of sentences and paths, never the whole book.
+
+One MP3 per section is written to the output directory
+(NNN_<title>.mp3, written as .part and renamed when complete). Sections whose
+file already exists are skipped. Progress inside a section is journaled
+(.progress.jsonl, see batch_journal): after an interruption the .part file is
+cut back to the last completed window and synthesis continues from the next
+sentence, so a restarted run loses at most one window.
+"""
+import codecs
+import concurrent.futures
+import itertools
+import os
+import re
+
+from .batch_journal import BatchJournal
+from .mp3_utils import append_mp3_frames
+from .sentence_splitter import iter_sentences
+from .tts_engine import CANCELLED_ERROR
+
+try:
+    import chardet
+except ImportError:
+    chardet = None
+
+# Sentences synthesized (and kept in memory) at a time
+WINDOW_SENTENCES = 48
+# Characters read per step; longer lines are processed in pieces
+READ_CHARS = 8192
+# Bytes inspected for encoding detection
+DETECT_BYTES = 65536
+# Journal of an unfinished run, inside the output directory
+PROGRESS_FILE = ".progress.jsonl"
+
+_HEADING_RE = re.compile(
+    r"^\s*(第[0-9０-９零一二三四五六七八九十百千万两〇]+[章回节卷部篇集]|序章|序言|楔子|引子|前言|后记|尾声|番外"
+    r"|(?:chapter|CHAPTER|Chapter)\s+\w+)")
+_HEADING_MAX_CHARS = 40
+_UNSAFE_FILENAME_RE = re.compile(r'[\\/:*?"<>|\s]+')
+
+
+def is_heading(line):
+    """True if a (complete) line looks like a chapter/section heading."""
+    stripped = line.strip()
+    return 0 < len(stripped) <= _HEADING_MAX_CHARS and bool(_HEADING_RE.match(stripped))
+
+
+def detect_encoding(path):
+    """Guesses the text encoding from the start of the file (UTF-8, then chardet, then GB18030)."""
+    with open(path, "rb") as fp:
+        head = fp.read(DETECT_BYTES)
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        # final=False: a multi-byte character cut off at the end of head is not an error
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    if chardet is not None:
+        guess = chardet.detect(head).get("encoding")
+        if guess:
+            return "gb18030" if guess.lower() in ("gb2312", "gbk") else guess
+    return "gb18030"
+
+
+def section_filename(index, title):
+    """Output filename for a section: NNN_<title>.mp3."""
+    safe = _UNSAFE_FILENAME_RE.sub("_", title or "").strip("_")[:40]
+    return f"{index:03d}_{safe}.mp3" if safe else f"{index:03d}.mp3"
+
+
+class DocumentReader:
+    """
+    Incremental reader for a long text file.
+
+    sections() yields (index, title, chunks) per section; chunks is a lazy iterator
+    over the section's text and must be consumed before advancing to the next
+    section. Text before the first heading is section 0 (title None).
+    """
+    def __init__(self, path, encoding=None, read_chars=READ_CHARS):
+        self.path = path
+        self.encoding = encoding or detect_encoding(path)
+        self.read_chars = read_chars
+        self.size = os.path.getsize(path)
+        self._fp = None
+        self._finished = False
+
+    @property
+    def fraction(self):
+        """Approximate share of the file read so far (0..1)."""
+        if self._finished:
+            return 1.0
+        if self._fp is None or not self.size:
+            return 0.0
+        try:
+            return min(1.0, self._fp.buffer.tell() / self.size)
+        except (OSError, ValueError):
+            return 0.0
+
+    def _iter_pieces(self):
+        """Yields (text, starts_line) pieces of at most read_chars characters."""
+        with open(self.path, "r", encoding=self.encoding, errors="replace", newline=None) as fp:
+            self._fp = fp
+            starts_line = True
+            try:
+                while True:
+                    piece = fp.readline(self.read_chars)
+                    if not piece:
+                        break
+                    yield piece, starts_line
+                    starts_line = piece.endswith("\n")
+            finally:
+                self._fp = None
+                self._finished = True
+
+    def _iter_tagged(self):
+        index, title = 0, None
+        for piece, starts_line in self._iter_pieces():
+            if starts_line and piece.endswith("\n") and is_heading(piece):
+                index += 1
+                title = piece.strip()
+            yield index, title, piece
+
+    def sections(self):
+        for (index, title), group in itertools.groupby(self._iter_tagged(), key=lambda t: (t[0], t[1])):
+            yield index, title, (piece for _, _, piece in group)
+
+
+def _open_progress_journal(path, voice, rate, output_dir, window_sentences):
+    """Journal of a run over this document and settings; a changed file starts over."""
+    stat = os.stat(path)
+    header = {"job": "document", "source": os.path.abspath(path), "size": stat.st_size,
+              "mtime": int(stat.st_mtime), "voice": voice, "rate": rate, "window": window_sentences}
+    return BatchJournal(os.path.join(output_dir, PROGRESS_FILE), header)
+
+
+def _open_section_output(tmp_path, resume):
+    """
+    Opens the section's .part file for appending. With a journaled window (resume)
+    the file is cut back to the end of that window.
+
+    Returns:
+        tuple: (file object, sentences already written)
+    """
+    if resume and os.path.exists(tmp_path) and os.path.getsize(tmp_path) >= resume["bytes"]:
+        out = open(tmp_path, "r+b")
+        out.truncate(resume["bytes"])
+        out.seek(0, os.SEEK_END)
+        return out, resume["sentences"]
+    return open(tmp_path, "wb"), 0
+
+
+def synthesize_document(engine, path, voice, rate, output_dir, window_sentences=WINDOW_SENTENCES,
+                        scope=None, on_progress=None):
+    """
+    Synthesizes a text file section by section into output_dir.
+    Designed to be called synchronously from a worker thread.
+
+    Args:
+        engine: TTSEngine used for batch synthesis (its cache stores the sentences).
+        on_progress: Optional callback(section_index, title, sentences_done, fraction, window)
+            called after every window; window is the list of sentences just written.
+
+    Returns:
+        list or str: Paths of the section files (written or already present), or Error string.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    try:
+        reader = DocumentReader(path)
+        journal = _open_progress_journal(path, voice, rate, output_dir, window_sentences)
+    except OSError as e:
+        return f"Error: Cannot open document: {e}"
+    resume_points = {e["section"]: e for e in journal.events("window")}
+
+    written = []
+    complete = False
+    try:
+        for index, title, chunks in reader.sections():
+            target_path = os.path.join(output_dir, section_filename(index, title))
+            if os.path.exists(target_path):
+                print(f"Document: Section {index} already written, skipping: {target_path}")
+                for _ in chunks:
+                    pass
+                written.append(target_path)
+                continue
+
+            sentences = (span.text for span in iter_sentences(chunks))
+            tmp_path = f"{target_path}.part"
+            out, done = _open_section_output(tmp_path, resume_points.get(index))
+            if done:
+                # Sentences already in the .part file are read past, not synthesized
+                for _ in itertools.islice(sentences, done):
+                    pass
+                print(f"Document: Resuming section {index} after {done} sentences")
+            with out:
+                while True:
+                    window = list(itertools.islice(sentences, window_sentences))
+                    if not window:
+                        break
+                    try:
+                        batch = engine.submit_batch(window, voice, rate, scope=scope).result()
+                    except concurrent.futures.CancelledError:
+                        return CANCELLED_ERROR
+                    if batch.failed:
+                        first = batch.failed[0]
+                        journal.append("failed", section=index, sentences=done, error=first.error,
+                                       attempts=max(r.attempts for r in batch.failed))
+                        return (f"Error: Section {index} ({title or 'start'}): {len(batch.failed)} sentences "
+                                f"failed, e.g. #{done + first.index}: {first.error}")
+                    for path in batch.paths:
+                        append_mp3_frames(out, engine.audio_source(path))
+                    out.flush()
+                    done += len(window)
+                    journal.append("window", section=index, sentences=done, bytes=out.tell())
+                    if on_progress:
+                        on_progress(index, title, done, reader.fraction, window)
+            if done:
+                os.replace(tmp_path, target_path)
+                written.append(target_path)
+                print(f"Document: Section {index} written ({done} sentences): {target_path}")
+            elif os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        complete = True
+    finally:
+        # An unfinished run keeps its .part files and journal for the next one
+        if complete:
+            journal.remove()
+        else:
+            journal.close()
+    return written
@@ -0,0 +1,204 @@
+# -*- coding:utf-8 -*-
+"""
+Minimal MPEG audio frame utilities.
+
+edge-tts returns plain MPEG-2 Layer III streams, so per-sentence segments can
+be joined into one playable file simply by copying their audio frames back to
+back. Tags (ID3v1/ID3v2) and Xing/Info/VBRI header frames are dropped because
+they would describe only the first segment.
+"""
+import os
+from collections import namedtuple
+
+from .shared_cache import partial_path
+
+Mp3Frame = namedtuple("Mp3Frame", ["offset", "length", "samples", "sample_rate"])
+
+# Bitrates in kbps, indexed by [version_is_mpeg1][layer][bitrate_index]
+_BITRATES = {
+    (True, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (True, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (True, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (False, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (False, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (False, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+
+# Sample rates indexed by version bits (0 = MPEG2.5, 2 = MPEG2, 3 = MPEG1)
+_SAMPLE_RATES = {
+    0: [11025, 12000, 8000],
+    2: [22050, 24000, 16000],
+    3: [44100, 48000, 32000],
+}
+
+
+def _id3v2_size(data, pos):
+    """Returns the total size of an ID3v2 tag starting at pos (0 if none)."""
+    if data[pos:pos + 3] != b"ID3" or len(data) < pos + 10:
+        return 0
+    size = 0
+    for b in data[pos + 6:pos + 10]:
+        size = (size << 7) | (b & 0x7F)
+    footer = 10 if data[pos + 5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _parse_header(data, pos):
+    """
+    Parses the 4-byte frame header at pos.
+
+    Returns:
+        tuple: (frame_length, samples, sample_rate) or None if not a valid header.
+    """
+    if pos + 4 > len(data):
+        return None
+    b0, b1, b2 = data[pos], data[pos + 1], data[pos + 2]
+    if b0 != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+
+    version = (b1 >> 3) & 0x03
+    layer_bits = (b1 >> 1) & 0x03
+    bitrate_index = b2 >> 4
+    sr_index = (b2 >> 2) & 0x03
+    if version == 1 or layer_bits == 0 or bitrate_index in (0, 15) or sr_index == 3:
+        return None
+
+    layer = 4 - layer_bits
+    is_mpeg1 = version == 3
+    bitrate = _BITRATES[(is_mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][sr_index]
+    padding = (b2 >> 1) & 0x01
+
+    if layer == 1:
+        length = (12 * bitrate // sample_rate + padding) * 4
+        samples = 384
+    elif layer == 2:
+        length = 144 * bitrate // sample_rate + padding
+        samples = 1152
+    else:
+        factor = 144 if is_mpeg1 else 72
+        length = factor * bitrate // sample_rate + padding
+        samples = 1152 if is_mpeg1 else 576
+    return length, samples, sample_rate
+
+
+def _is_info_frame(data, frame):
+    """Detects Xing/Info/VBRI header frames that only carry stream metadata."""
+    pos = frame.offset
+    b1, b3 = data[pos + 1], data[pos + 3]
+    is_mpeg1 = ((b1 >> 3) & 0x03) == 3
+    mono = (b3 >> 6) == 3
+    if is_mpeg1:
+        side_info = 17 if mono else 32
+    else:
+        side_info = 9 if mono else 17
+    tag = data[pos + 4 + side_info:pos + 8 + side_info]
+    if tag in (b"Xing", b"Info"):
+        return True
+    return data[pos + 36:pos + 40] == b"VBRI"
+
+
+def iter_frames(data):
+    """
+    Yields every audio frame in an MP3 byte string.
+    Leading ID3v2 tags, a trailing ID3v1 tag and garbage between frames are skipped.
+    """
+    end = len(data)
+    if end >= 128 and data[end - 128:end - 125] == b"TAG":
+        end -= 128
+
+    pos = 0
+    while pos + 4 <= end:
+        tag_size = _id3v2_size(data, pos)
+        if tag_size:
+            pos += tag_size
+            continue
+        header = _parse_header(data, pos)
+        if header is None:
+            pos += 1
+            continue
+        length, samples, sample_rate = header
+        if length <= 0 or pos + length > end:
+            break
+        yield Mp3Frame(pos, length, samples, sample_rate)
+        pos += length
+
+
+def audio_frames(data):
+    """Returns the list of frames that carry audio (Xing/Info frames removed)."""
+    return [f for f in iter_frames(data) if not _is_info_frame(data, f)]
+
+
+def append_mp3_frames(out, path, durations=None):
+    """
+    Copies the audio frames of the MP3 file at path to the open binary file out,
+    so long outputs can be built incrementally. path may also be the MP3 data
+    itself (bytes or memoryview, e.g. a segment from the packed store). If
+    durations is a list, the copied audio's length in seconds is appended to it.
+
+    Returns:
+        int: Number of frames written.
+    """
+    if isinstance(path, (bytes, bytearray, memoryview)):
+        data = path
+    else:
+        with open(path, "rb") as fp:
+            data = fp.read()
+    view = memoryview(data)
+    frames = audio_frames(data)
+    for frame in frames:
+        out.write(view[frame.offset:frame.offset + frame.length])
+    if durations is not None:
+        durations.append(frames_duration(frames))
+    return len(frames)
+
+
+def concat_mp3_files(input_paths, output_path, durations=None):
+    """
+    Joins several MP3 files (paths or in-memory data, see append_mp3_frames) into
+    one by copying their audio frames in order.
+    The result is written to a temporary file first and then moved into place,
+    so a partially written output never appears under output_path.
+    If durations is a list, each input's length in seconds is appended to it.
+
+    Returns:
+        int: Number of frames written.
+    """
+    tmp_path = partial_path(output_path)
+    frame_count = 0
+    try:
+        with open(tmp_path, "wb") as out:
+            for path in input_paths:
+                frame_count += append_mp3_frames(out, path, durations)
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+    return frame_count
+
+
+def frames_duration(frames):
+    """Total playback time of a frame list in seconds."""
+    return sum(f.samples / f.sample_rate for f in frames)
+
+
+def slice_mp3(data, start_s, end_s=None):
+    """
+    Cuts the frames covering [start_s, end_s) out of an MP3 byte string.
+    Cuts happen on frame boundaries (24-48 ms for typical TTS output).
+
+    Returns:
+        bytes: A standalone MP3 stream.
+    """
+    view = memoryview(data)
+    out = bytearray()
+    t = 0.0
+    for frame in audio_frames(data):
+        duration = frame.samples / frame.sample_rate
+        mid = t + duration / 2
+        if mid >= start_s and (end_s is None or mid < end_s):
+            out += view[frame.offset:frame.offset + frame.length]
+        elif end_s is not None and t >= end_s:
+            break
+        t += duration
+    return bytes(out)
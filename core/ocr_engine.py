@@ -3,6 +3,8 @@ import os
 import re
 import sys
 
+from .transport import get_transport
+
 # --- Baidu OCR Configuration (Extracted from your existing code) ---
 BAIDU_OCR_CONFIG = {
     "APP_ID": "7298408",
@@ -13,6 +15,9 @@ BAIDU_OCR_CONFIG = {
 # --- Platform-aware Import and Error Handling for Baidu SDK ---
 BAIDU_OCR_AVAILABLE = False
 
+# Host of the Baidu AI API, used for the shared per-host concurrency limit
+BAIDU_OCR_HOST = "aip.baidubce.com"
+
 if sys.platform == "win32":
     # 只在 Windows 平台尝试导入
     try:
@@ -43,8 +48,13 @@ class OCREngine:
     - Windows: Full OCR support with baidu-aip
     - macOS/Linux: Returns platform not supported error
     """
-    def __init__(self):
-        """Initializes the Baidu OCR client."""
+    def __init__(self, transport=None):
+        """
+        Initializes the Baidu OCR client.
+        The SDK performs its own HTTP calls; the shared transport limits how many
+        run against the Baidu host at once.
+        """
+        self.transport = transport or get_transport()
         self.client = self._get_ocr_client()
         self.is_available = BAIDU_OCR_AVAILABLE
 
@@ -78,7 +88,8 @@ class OCREngine:
                 image_data = fp.read()
             
             # Call the Baidu API (this is the blocking I/O operation)
-            result = self.client.basicGeneral(image_data)
+            with self.transport.host_slot(BAIDU_OCR_HOST):
+                result = self.client.basicGeneral(image_data)
             
             # --- Result Parsing and Custom Filtering Logic ---
             if 'error_code' in result:
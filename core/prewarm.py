@@ -0,0 +1,152 @@
+# -*- coding:utf-8 -*-
+"""
+Corpus pre-warm: renders known course material ahead of time into a cache
+pack (see cache_pack) that the app mounts read-only, so the first play of
+standard material is a local disk read instead of an edge-tts request.
+
+Every sentence of the corpus is synthesized for each requested voice and rate
+through the engine's batch path, one window at a time. Two budgets keep the
+job polite towards the service:
+
+- max_requests: total edge-tts requests the job may send. A window is
+  trimmed (and the job stops) before its planned requests would exceed the
+  budget; retries of failed requests can go slightly over it.
+- max_bytes_per_s: average download rate; the job sleeps between windows
+  to stay under it.
+
+Finished entries are staged as they complete, so a job stopped by a budget,
+failures or an interruption continues from there on the next run; the pack is
+published only when every entry is present.
+"""
+import os
+import time
+
+from .cache_pack import PackBuilder
+from .document_processor import detect_encoding
+from .sentence_splitter import iter_sentences
+
+# Sentences per batch submitted to the engine
+WINDOW_SENTENCES = 32
+# Characters read per step from a corpus file
+READ_CHARS = 8192
+
+
+def read_corpus(paths):
+    """Unique sentences of the corpus text files, in order of first appearance."""
+    seen = set()
+    sentences = []
+    for path in paths:
+        with open(path, "r", encoding=detect_encoding(path), errors="replace") as fp:
+            chunks = iter(lambda: fp.read(READ_CHARS), "")
+            for span in iter_sentences(chunks):
+                text = span.text.strip()
+                if text and text not in seen:
+                    seen.add(text)
+                    sentences.append(text)
+    return sentences
+
+
+class PrewarmReport:
+    """Outcome of prewarm_corpus."""
+    def __init__(self):
+        self.rendered = 0
+        self.reused = 0
+        self.failed = 0
+        self.requests = 0
+        self.bytes = 0
+        self.budget_exhausted = False
+        self.pack_path = None
+
+    @property
+    def complete(self):
+        return self.pack_path is not None
+
+    def __repr__(self):
+        return (f"PrewarmReport(rendered={self.rendered}, reused={self.reused}, failed={self.failed}, "
+                f"requests={self.requests}, bytes={self.bytes}, budget_exhausted={self.budget_exhausted}, "
+                f"pack={self.pack_path})")
+
+
+def _fit_request_budget(engine, todo, voice, rate, remaining):
+    """A prefix of todo (halved until it fits) whose batch needs at most `remaining` requests."""
+    while todo and engine.estimate_requests(todo, voice, rate) > remaining:
+        todo = todo[:len(todo) // 2] if len(todo) > 1 else []
+    return todo
+
+
+def prewarm_corpus(engine, sentences, voices, rates, output_dir, name, version,
+                   max_requests=None, max_bytes_per_s=None, window_sentences=WINDOW_SENTENCES,
+                   on_progress=None):
+    """
+    Renders sentences for every voice/rate into the pack <name>-<version> in output_dir.
+    Designed to be called synchronously (headless job or worker thread).
+
+    Args:
+        engine: TTSEngine used for synthesis (its cache is filled along the way).
+        max_requests: Request budget for this run (None = unlimited).
+        max_bytes_per_s: Bandwidth budget, average audio bytes per second (None = unlimited).
+        on_progress: Optional callback(voice, rate, sentences_done, total).
+
+    Returns:
+        PrewarmReport: pack_path is set when the pack was complete and published.
+    """
+    builder = PackBuilder(output_dir, name, version, voices, rates)
+    report = PrewarmReport()
+    requests_at_start, bytes_at_start = engine.requests_sent, engine.bytes_received
+    started = time.monotonic()
+    missing = 0
+
+    for voice in voices:
+        for rate in rates:
+            for start in range(0, len(sentences), window_sentences):
+                window = sentences[start:start + window_sentences]
+                paths = {s: engine.cache_path(s, voice, rate) for s in window}
+                todo = [s for s in window if not builder.has(os.path.basename(paths[s]))]
+                if report.budget_exhausted:
+                    missing += len(todo)
+                    continue
+                if todo and max_requests is not None:
+                    fitting = _fit_request_budget(
+                        engine, todo, voice, rate, max_requests - (engine.requests_sent - requests_at_start))
+                    if len(fitting) < len(todo):
+                        report.budget_exhausted = True
+                        print(f"Prewarm: Request budget of {max_requests} reached; stopping")
+                        missing += len(todo) - len(fitting)
+                    todo = fitting
+                if not todo:
+                    continue
+
+                cached = {s for s in todo if engine.is_cached(paths[s])}
+                batch = engine.submit_batch(todo, voice, rate).result()
+                for result in batch:
+                    if not result.ok:
+                        report.failed += 1
+                        continue
+                    entry = engine.manifest.get(result.path)
+                    builder.add(result.path, engine.audio_source(result.path), voice, rate, result.sentence,
+                                duration_ms=entry.duration_ms if entry else None)
+                    if result.sentence in cached:
+                        report.reused += 1
+                    else:
+                        report.rendered += 1
+                builder.save()
+
+                report.requests = engine.requests_sent - requests_at_start
+                report.bytes = engine.bytes_received - bytes_at_start
+                if on_progress:
+                    on_progress(voice, rate, min(start + window_sentences, len(sentences)), len(sentences))
+                if max_bytes_per_s:
+                    # Hold the average download rate at the budget
+                    ahead = report.bytes / max_bytes_per_s - (time.monotonic() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+
+    report.requests = engine.requests_sent - requests_at_start
+    report.bytes = engine.bytes_received - bytes_at_start
+    if not report.failed and not missing:
+        report.pack_path = builder.publish()
+        print(f"Prewarm: Published {report.pack_path} ({len(builder)} entries)")
+    else:
+        print(f"Prewarm: Pack incomplete ({len(builder)} entries staged, {report.failed} failed, "
+              f"{missing} not attempted); run again to continue")
+    return report
@@ -0,0 +1,294 @@
+# -*- coding:utf-8 -*-
+"""
+Packed, content-addressed segment storage (optional cache backend).
+
+Instead of one small MP3 file per cached sentence, segments are appended to
+large pack files and located through an index of fixed-size records:
+
+    packs/pack_00001.dat   segments back to back (a new pack every PACK_TARGET_BYTES)
+    packs/index.dat        RECORD per put/delete: key, pack number, offset, length
+
+A key is the SHA-1 of (voice, rate, text hash), i.e. the configuration plus
+the content, independent of the cache prefix: the single_ entry of a sentence
+and the full_ render of a one-sentence text are the same audio and are stored
+once. The store does not count references; the engine deletes such a
+segment only when neither entry is left. The index is memory-mapped and
+parsed without copying when the store is opened; later records for a key
+override earlier ones (pack 0 marks a deletion), so a torn final record
+after a crash only loses that record.
+
+Reads are zero-copy: view() returns a memoryview into the memory-mapped pack
+and open() a file-like reader over it, which the player accepts like a file.
+Deleted segments leave garbage in their pack; compact() (run in the background
+by request_compaction) copies the live segments of mostly-garbage packs into
+the active pack and removes the old files.
+"""
+import hashlib
+import io
+import mmap
+import os
+import struct
+import threading
+
+# Pack size at which a new pack file is started
+PACK_TARGET_BYTES = 64 * 1024 * 1024
+# Packs with at least this share of deleted bytes are compacted
+COMPACT_GARBAGE_RATIO = 0.5
+
+INDEX_NAME = "index.dat"
+# key (SHA-1), pack number (0 = deleted), offset, length
+RECORD = struct.Struct("<20sIQI")
+
+
+def content_key(voice, rate, text_hash):
+    """Store key for a segment of text (by its cache hash) spoken with voice/rate."""
+    return hashlib.sha1(f"{voice}|{rate}|{text_hash}".encode("utf-8")).digest()
+
+
+class SegmentReader(io.RawIOBase):
+    """Read-only, seekable file object over a memoryview (no copy of the audio)."""
+    def __init__(self, view):
+        super().__init__()
+        self._view = view
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = len(self._view) + offset
+        else:
+            raise ValueError(f"invalid whence: {whence}")
+        self._pos = max(0, pos)
+        return self._pos
+
+    def readinto(self, b):
+        chunk = self._view[self._pos:self._pos + len(b)]
+        n = len(chunk)
+        b[:n] = chunk
+        self._pos += n
+        return n
+
+
+class SegmentStore:
+    """Append-only pack files plus index for one directory. Thread-safe."""
+    def __init__(self, root, pack_target_bytes=PACK_TARGET_BYTES):
+        self.root = root
+        self.pack_target_bytes = pack_target_bytes
+        self._lock = threading.RLock()
+        # key -> (pack, offset, length)
+        self._index = {}
+        # pack -> bytes on disk
+        self._pack_sizes = {}
+        # pack -> (mmap, mapped length); remapped when the pack has grown past it
+        self._maps = {}
+        self._active = None
+        self._active_fp = None
+        self._index_fp = None
+        self._compactor = None
+        self._load()
+
+    def _pack_path(self, pack):
+        return os.path.join(self.root, f"pack_{pack:05d}.dat")
+
+    def _load(self):
+        os.makedirs(self.root, exist_ok=True)
+        for name in os.listdir(self.root):
+            if name.startswith("pack_") and name.endswith(".dat"):
+                pack = int(name[5:-4])
+                self._pack_sizes[pack] = os.path.getsize(os.path.join(self.root, name))
+        index_path = os.path.join(self.root, INDEX_NAME)
+        size = os.path.getsize(index_path) if os.path.exists(index_path) else 0
+        usable = size - size % RECORD.size
+        if usable:
+            with open(index_path, "rb") as fp:
+                with mmap.mmap(fp.fileno(), usable, access=mmap.ACCESS_READ) as mapped:
+                    view = memoryview(mapped)
+                    try:
+                        for key, pack, offset, length in RECORD.iter_unpack(view):
+                            if pack and offset + length <= self._pack_sizes.get(pack, 0):
+                                self._index[key] = (pack, offset, length)
+                            else:
+                                self._index.pop(key, None)
+                    finally:
+                        view.release()
+        if usable != size:
+            # Drop a record torn by a crash so new records stay aligned
+            with open(index_path, "r+b") as fp:
+                fp.truncate(usable)
+        self._index_fp = open(index_path, "ab")
+        self._active = max(self._pack_sizes, default=0) or self._new_pack()
+
+    def _new_pack(self):
+        pack = max(self._pack_sizes, default=0) + 1
+        open(self._pack_path(pack), "ab").close()
+        self._pack_sizes[pack] = 0
+        return pack
+
+    def _write_record(self, key, pack, offset, length):
+        self._index_fp.write(RECORD.pack(key, pack, offset, length))
+        self._index_fp.flush()
+
+    # --- Lookups ---
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def size_of(self, key):
+        location = self._index.get(key)
+        return location[2] if location else None
+
+    def view(self, key):
+        """Zero-copy memoryview of a segment, or None if the key is not stored."""
+        with self._lock:
+            location = self._index.get(key)
+            if location is None:
+                return None
+            pack, offset, length = location
+            if not length:
+                return memoryview(b"")
+            mapped, mapped_length = self._maps.get(pack, (None, 0))
+            if offset + length > mapped_length:
+                # First read of this pack, or it grew since it was mapped; older views keep the old map alive
+                with open(self._pack_path(pack), "rb") as fp:
+                    mapped_length = os.fstat(fp.fileno()).st_size
+                    mapped = mmap.mmap(fp.fileno(), mapped_length, access=mmap.ACCESS_READ)
+                self._maps[pack] = (mapped, mapped_length)
+            return memoryview(mapped)[offset:offset + length]
+
+    def open(self, key):
+        """File-like reader over a segment (for players), or None."""
+        view = self.view(key)
+        return SegmentReader(view) if view is not None else None
+
+    # --- Updates ---
+    def put(self, key, data):
+        """Appends a segment (replacing any earlier one under key)."""
+        with self._lock:
+            if self._pack_sizes[self._active] >= self.pack_target_bytes:
+                self._close_active()
+                self._active = self._new_pack()
+            if self._active_fp is None:
+                self._active_fp = open(self._pack_path(self._active), "ab")
+            offset = self._pack_sizes[self._active]
+            self._active_fp.write(data)
+            self._active_fp.flush()
+            self._pack_sizes[self._active] = offset + len(data)
+            self._index[key] = (self._active, offset, len(data))
+            self._write_record(key, self._active, offset, len(data))
+
+    def delete(self, key):
+        with self._lock:
+            if self._index.pop(key, None) is not None:
+                self._write_record(key, 0, 0, 0)
+
+    def _close_active(self):
+        if self._active_fp is not None:
+            self._active_fp.close()
+            self._active_fp = None
+
+    # --- Compaction ---
+    def garbage(self):
+        """{pack: deleted bytes} for every pack."""
+        with self._lock:
+            live = dict.fromkeys(self._pack_sizes, 0)
+            for pack, _, length in self._index.values():
+                live[pack] += length
+            return {pack: size - live.get(pack, 0) for pack, size in self._pack_sizes.items()}
+
+    def request_compaction(self):
+        """Starts compact() on a background thread unless it is running or not needed."""
+        with self._lock:
+            if self._compactor is not None and self._compactor.is_alive():
+                return
+            if not self._compaction_candidates():
+                return
+            self._compactor = threading.Thread(target=self.compact, name="SegmentCompaction", daemon=True)
+            self._compactor.start()
+
+    def _compaction_candidates(self):
+        return [pack for pack, waste in self.garbage().items()
+                if pack != self._active and waste and waste >= self._pack_sizes[pack] * COMPACT_GARBAGE_RATIO]
+
+    def compact(self):
+        """
+        Moves the live segments of mostly-deleted packs into the active pack and
+        deletes those packs. Segments are moved one at a time, so readers and
+        writers only wait for a single copy.
+
+        Returns:
+            int: Bytes reclaimed.
+        """
+        with self._lock:
+            waste = self.garbage()
+            candidates = set(self._compaction_candidates())
+            keys = [k for k, (pack, _, _) in self._index.items() if pack in candidates]
+        if not candidates:
+            return 0
+        for key in keys:
+            with self._lock:
+                location = self._index.get(key)
+                if location is None or location[0] not in candidates:
+                    continue
+                view = self.view(key)
+                try:
+                    self.put(key, view)
+                finally:
+                    view.release()
+
+        with self._lock:
+            # Rewrite the index with live records only, then drop the emptied packs
+            index_path = os.path.join(self.root, INDEX_NAME)
+            tmp_path = f"{index_path}.part"
+            with open(tmp_path, "wb") as fp:
+                for key, (pack, offset, length) in self._index.items():
+                    fp.write(RECORD.pack(key, pack, offset, length))
+            self._index_fp.close()
+            os.replace(tmp_path, index_path)
+            self._index_fp = open(index_path, "ab")
+            reclaimed = 0
+            for pack in candidates:
+                self._maps.pop(pack, None)
+                self._pack_sizes.pop(pack)
+                reclaimed += waste[pack]
+                try:
+                    os.unlink(self._pack_path(pack))
+                except OSError as e:
+                    # Still mapped by a reader (Windows); its space is reclaimed on a later run
+                    print(f"Warning: Failed to remove compacted pack {pack}: {e}")
+        print(f"Segment store: compacted {len(candidates)} packs, reclaimed {reclaimed / 1048576:.1f} MiB")
+        return reclaimed
+
+    def close(self):
+        with self._lock:
+            self._close_active()
+            if self._index_fp is not None:
+                self._index_fp.close()
+                self._index_fp = None
+            self._maps.clear()
+
+    def clear(self):
+        """Deletes every segment and pack file."""
+        with self._lock:
+            self.close()
+            for name in os.listdir(self.root) if os.path.isdir(self.root) else []:
+                try:
+                    os.unlink(os.path.join(self.root, name))
+                except OSError as e:
+                    print(f"Warning: Failed to delete {name}: {e}")
+            self._index.clear()
+            self._pack_sizes.clear()
+            self._load()
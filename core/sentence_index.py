@@ -0,0 +1,114 @@
+# -*- coding:utf-8 -*-
+"""
+Sentence-to-time index for rendered audio.
+
+edge-tts reports WordBoundary (or SentenceBoundary) events with audio offsets
+while it streams. Matching the boundary texts against the sentence list gives
+the time range of every sentence inside one rendered file, so single sentences
+can later be cut out of it without another network call.
+"""
+import bisect
+import json
+import os
+
+from .shared_cache import partial_path
+
+INDEX_VERSION = 1
+
+# edge-tts offsets and durations are in 100-nanosecond ticks
+TICKS_PER_MS = 10_000
+
+# Cut slightly before the first word of a sentence so its onset is not clipped
+ONSET_PAD_MS = 60
+
+
+def index_path_for(audio_path):
+    """The index lives next to the audio file: full_xxx.mp3 -> full_xxx.json."""
+    return os.path.splitext(audio_path)[0] + ".json"
+
+
+def build_sentence_ranges(sentences, boundaries, duration_ms):
+    """
+    Maps boundary events onto sentences.
+
+    Args:
+        sentences: Sentence list in render order (joined without separators).
+        boundaries: [(text, offset_ticks, duration_ticks), ...] in stream order.
+        duration_ms: Total audio duration.
+
+    Returns:
+        list: [[start_ms, end_ms], ...] covering the audio contiguously, or None if
+        no boundary could be matched.
+    """
+    if not sentences:
+        return None
+
+    starts = []
+    pos = 0
+    for s in sentences:
+        starts.append(pos)
+        pos += len(s)
+    full_text = "".join(sentences)
+
+    first_onset = [None] * len(sentences)
+    cursor = 0
+    for text, offset, _duration in boundaries:
+        text = (text or "").strip()
+        if not text:
+            continue
+        found = full_text.find(text, cursor)
+        if found == -1:
+            continue
+        idx = bisect.bisect_right(starts, found) - 1
+        if first_onset[idx] is None:
+            first_onset[idx] = offset / TICKS_PER_MS
+        cursor = found + len(text)
+
+    if all(v is None for v in first_onset):
+        return None
+
+    # Cut points: sentence i starts where its first word starts (minus a pad).
+    # Sentences without a matched word share the cut of the next matched one.
+    cuts = [0.0] * (len(sentences) + 1)
+    cuts[-1] = float(duration_ms)
+    next_cut = float(duration_ms)
+    for i in range(len(sentences) - 1, 0, -1):
+        if first_onset[i] is not None:
+            next_cut = max(0.0, first_onset[i] - ONSET_PAD_MS)
+        cuts[i] = min(next_cut, cuts[i + 1])
+    return [[round(cuts[i]), round(cuts[i + 1])] for i in range(len(sentences))]
+
+
+def write_sentence_index(audio_path, sentences, ranges, duration_ms):
+    """Stores the index as JSON next to audio_path (write-then-rename)."""
+    path = index_path_for(audio_path)
+    payload = {
+        "version": INDEX_VERSION,
+        "audio": os.path.basename(audio_path),
+        "duration_ms": round(duration_ms),
+        "sentences": sentences,
+        "ranges_ms": ranges,
+    }
+    tmp_path = partial_path(path)
+    with open(tmp_path, "w", encoding="utf-8") as fp:
+        json.dump(payload, fp, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_sentence_index(audio_path):
+    """
+    Returns:
+        dict or None: {"sentences": [...], "ranges_ms": [[start, end], ...], ...}
+    """
+    path = index_path_for(audio_path)
+    try:
+        with open(path, "r", encoding="utf-8") as fp:
+            payload = json.load(fp)
+    except (OSError, ValueError):
+        return None
+    if payload.get("version") != INDEX_VERSION:
+        return None
+    if len(payload.get("sentences", [])) != len(payload.get("ranges_ms", [])):
+        return None
+    return payload
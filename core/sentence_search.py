@@ -0,0 +1,153 @@
+# -*- coding:utf-8 -*-
+"""
+Character n-gram index over the texts of cached audio, for finding and
+replaying something heard before without synthesizing it again.
+
+Every cache entry with a known text (single sentences, full-text and joined
+renders, entries of mounted cache packs) is a document. Its text is
+normalized (whitespace removed, case folded) and every character unigram and
+bigram gets a posting: an array of document ids in insertion order. A query
+looks up the posting of its rarest gram and checks the candidates with a
+substring test, so the cost depends on how common the query is, not on the
+size of the cache.
+
+The index is incremental: add() and remove() follow cache writes, hits and
+evictions (see CacheManifest.subscribe). Removed documents leave stale ids in
+their postings; they are skipped by queries and dropped once they outnumber
+the live documents.
+"""
+import heapq
+import threading
+from array import array
+
+# Longest gram indexed; longer queries are checked against candidates of their rarest bigram
+NGRAM = 2
+# Kinds of cache entries that are searchable (stretched and grouped renders are derived audio)
+SEARCHABLE_KINDS = ("single", "full", "joined")
+
+
+def normalize(text):
+    return "".join(text.split()).casefold()
+
+
+def _grams(norm):
+    grams = set(norm)
+    grams.update(norm[i:i + NGRAM] for i in range(len(norm) - NGRAM + 1))
+    return grams
+
+
+class SearchHit:
+    """One cached entry matching a query."""
+    __slots__ = ("name", "path", "text", "voice", "rate", "kind", "last_access", "in_pack", "_norm")
+
+    def __init__(self, name, path, text, voice, rate, kind, last_access=0.0, in_pack=False):
+        self.name = name
+        # Cache path of the audio (for TTSEngine.audio_source / playback)
+        self.path = path
+        self.text = text
+        self.voice = voice
+        self.rate = rate
+        self.kind = kind
+        self.last_access = last_access
+        self.in_pack = in_pack
+        self._norm = normalize(text)
+
+    def __repr__(self):
+        return f"SearchHit({self.kind}, {self.voice}, {self.rate:+d}%, {self.text!r})"
+
+
+class SentenceSearchIndex:
+    """Incremental n-gram index of cache entry texts. Thread-safe."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        # doc id -> SearchHit, or None once removed
+        self._docs = []
+        # entry name -> doc id
+        self._ids = {}
+        # gram -> array of doc ids
+        self._postings = {}
+        self._dead = 0
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, hit):
+        """Indexes hit (replacing the document of the same entry name)."""
+        with self._lock:
+            self._add_locked(hit)
+
+    def add_all(self, hits):
+        """Bulk form of add() (one lock acquisition, for rebuilding the index)."""
+        with self._lock:
+            for hit in hits:
+                self._add_locked(hit)
+
+    def _add_locked(self, hit):
+        current = self._ids.get(hit.name)
+        if current is not None:
+            doc = self._docs[current]
+            if doc.text == hit.text:
+                # Same text (e.g. a cache hit): only the ranking data changes
+                doc.last_access = max(doc.last_access, hit.last_access)
+                return
+            self._remove_locked(hit.name)
+        doc_id = len(self._docs)
+        self._docs.append(hit)
+        self._ids[hit.name] = doc_id
+        postings = self._postings
+        for gram in _grams(hit._norm):
+            posting = postings.get(gram)
+            if posting is None:
+                posting = postings[gram] = array("I")
+            posting.append(doc_id)
+
+    def remove(self, name):
+        with self._lock:
+            self._remove_locked(name)
+            if self._dead > max(1024, len(self._ids)):
+                self._compact_locked()
+
+    def _remove_locked(self, name):
+        doc_id = self._ids.pop(name, None)
+        if doc_id is not None:
+            self._docs[doc_id] = None
+            self._dead += 1
+
+    def _compact_locked(self):
+        docs = [d for d in self._docs if d is not None]
+        self._docs, self._ids, self._postings, self._dead = [], {}, {}, 0
+        for doc in docs:
+            self._add_locked(doc)
+
+    def clear(self):
+        with self._lock:
+            self._docs, self._ids, self._postings, self._dead = [], {}, {}, 0
+
+    def search(self, query, limit=50, voice=None, rate=None):
+        """
+        Entries whose text contains query (whitespace and case ignored), best
+        first: exact matches, then shorter texts, then the most recently used.
+        voice/rate restrict the results to one configuration.
+
+        Returns:
+            list: SearchHit objects (at most limit).
+        """
+        norm = normalize(query)
+        if not norm:
+            return []
+        grams = _grams(norm) if len(norm) <= NGRAM else {norm[i:i + NGRAM] for i in range(len(norm) - 1)}
+        with self._lock:
+            postings = [self._postings.get(g) for g in grams]
+            if any(p is None for p in postings):
+                return []
+            rarest = min(postings, key=len)
+            docs = self._docs
+            matches = []
+            for doc_id in rarest:
+                doc = docs[doc_id]
+                if doc is None or (voice is not None and doc.voice != voice) or (rate is not None and doc.rate != rate):
+                    continue
+                if norm in doc._norm:
+                    matches.append(doc)
+        return heapq.nsmallest(limit, matches,
+                               key=lambda d: (d._norm != norm, len(d._norm), -d.last_access, d.name))
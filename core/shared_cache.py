@@ -0,0 +1,183 @@
+# -*- coding:utf-8 -*-
+"""
+Cross-process coordination for an audio cache shared by several app instances
+(e.g. one per workstation profile, all pointed at the same network directory).
+
+- Every instance holds a lock on its own file in instances/ while it runs.
+  Another instance is alive exactly when its file cannot be locked, so stale
+  files of crashed instances are recognized and removed. The cache is only
+  cleared when no other instance is alive.
+- Rendering an entry takes the lock locks/<entry name>.lock. When several
+  instances request the same sentence, one synthesizes it and the others wait
+  for the lock, then find the published file.
+- Files are written under a per-process temporary name (partial_path) and
+  published by rename, so no instance ever reads a half-written file.
+
+Locks are advisory (flock on POSIX, msvcrt on Windows) and released by the
+OS when a process dies.
+"""
+import asyncio
+import getpass
+import os
+import re
+import socket
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+LOCKING_AVAILABLE = fcntl is not None or msvcrt is not None
+
+INSTANCES_DIR = "instances"
+LOCKS_DIR = "locks"
+# Seconds between attempts to take a lock held by another process
+LOCK_POLL_S = 0.2
+# Seconds to wait for another instance's render before rendering anyway
+ENTRY_LOCK_TIMEOUT_S = 120.0
+
+# Distinguishes this process's temporary files from other instances' (pids repeat across hosts)
+_PROCESS_TAG = uuid.uuid4().hex[:12]
+_UNSAFE_NAME_RE = re.compile(r"[^\w.-]+")
+
+
+def partial_path(path):
+    """Temporary name to write path under before publishing it with os.replace."""
+    return f"{path}.{_PROCESS_TAG}.part"
+
+
+def instance_name():
+    """Stable name of this host and user (keeps per-instance files, such as job journals, apart)."""
+    try:
+        user = getpass.getuser()
+    except Exception:
+        user = "user"
+    return _UNSAFE_NAME_RE.sub("_", f"{socket.gethostname()}-{user}")
+
+
+class FileLock:
+    """Exclusive advisory lock on a lock file. Not reentrant."""
+    def __init__(self, path):
+        self.path = path
+        self._fp = None
+
+    @property
+    def held(self):
+        return self._fp is not None
+
+    def _try_acquire(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fp = open(self.path, "a+b")
+        try:
+            if fcntl is not None:
+                fcntl.flock(fp.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            elif msvcrt is not None:
+                fp.seek(0)
+                msvcrt.locking(fp.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            fp.close()
+            return False
+        self._fp = fp
+        return True
+
+    def acquire(self, blocking=True, timeout=None):
+        """
+        Takes the lock, polling while another process holds it.
+
+        Returns:
+            bool: False if not blocking (or timed out) and the lock is held elsewhere.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._try_acquire():
+            if not blocking or (deadline is not None and time.monotonic() >= deadline):
+                return False
+            time.sleep(LOCK_POLL_S)
+        return True
+
+    async def acquire_async(self, timeout=None):
+        """acquire() for coroutines: waits with asyncio.sleep instead of blocking the loop."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._try_acquire():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(LOCK_POLL_S)
+        return True
+
+    def release(self, remove=False):
+        """
+        Releases the lock. remove=True also deletes the lock file; a process
+        still waiting on the old file gets the lock and then re-checks the cache,
+        which is why entry locks are only removed after publishing.
+        """
+        fp, self._fp = self._fp, None
+        if fp is None:
+            return
+        if remove:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                # Windows cannot delete an open file; it is reused next time
+                pass
+        try:
+            if fcntl is not None:
+                fcntl.flock(fp.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                fp.seek(0)
+                msvcrt.locking(fp.fileno(), msvcrt.LK_UNLCK, 1)
+        except OSError:
+            pass
+        finally:
+            fp.close()
+
+
+class SharedCache:
+    """Membership and entry locks of one shared cache directory."""
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.instances_dir = os.path.join(cache_dir, INSTANCES_DIR)
+        self.locks_dir = os.path.join(cache_dir, LOCKS_DIR)
+        self.instance = instance_name()
+        if not LOCKING_AVAILABLE:
+            print("Warning: No file locking on this platform; the shared cache cannot coordinate instances")
+        self._presence = FileLock(os.path.join(self.instances_dir, f"{self.instance}_{_PROCESS_TAG}.lock"))
+        # Another instance may take the new file for a stale one and remove it before it is locked
+        while self._presence.acquire(blocking=False) and not os.path.exists(self._presence.path):
+            self._presence.release()
+
+    def entry_lock(self, path):
+        """Lock guarding the render of the cache entry at path."""
+        return FileLock(os.path.join(self.locks_dir, f"{os.path.basename(path)}.lock"))
+
+    def other_instances(self):
+        """
+        Number of other live instances using the cache. Lock files left by
+        crashed instances are removed on the way.
+        """
+        if not LOCKING_AVAILABLE:
+            # Without locks liveness cannot be told; assume the cache is in use
+            return 1
+        alive = 0
+        own = os.path.basename(self._presence.path)
+        try:
+            names = os.listdir(self.instances_dir)
+        except OSError:
+            return 0
+        for name in names:
+            if name == own or not name.endswith(".lock"):
+                continue
+            probe = FileLock(os.path.join(self.instances_dir, name))
+            if probe.acquire(blocking=False):
+                probe.release(remove=True)
+            else:
+                alive += 1
+        return alive
+
+    def close(self):
+        self._presence.release(remove=True)
@@ -0,0 +1,370 @@
+# -*- coding:utf-8 -*-
+"""
+Concurrency control for batch synthesis.
+
+AdaptiveConcurrencyLimiter keeps an in-flight window that grows additively while
+requests succeed with healthy latency and shrinks multiplicatively on errors or
+throttling (AIMD), so large batches settle at the rate edge-tts will sustain.
+The limiter is thread-safe and can be awaited from any event loop.
+
+Waiting requests are served by priority: interactive requests (a double-clicked
+sentence) go ahead of background pre-caching, which goes ahead of speculative
+pre-rendering; interactive requests may use one slot beyond the window, and a
+queued request can be promoted while it waits.
+
+SingleFlight collapses concurrent requests for the same cache path into one
+network call; later callers await the result of the call already in flight.
+
+SynthesisScope groups the work submitted for one configuration (text, voice,
+rate) so it can be cancelled as a whole once that configuration is superseded.
+"""
+import asyncio
+import concurrent.futures
+import heapq
+import itertools
+import threading
+import time
+
+# Lower value = served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+# Guesses (pre-rendering text the user has not submitted yet): only when nothing else waits
+PRIORITY_SPECULATIVE = 20
+
+
+def current_task_cancelling():
+    """True if the running task has a pending cancellation request (Python 3.11+)."""
+    task = asyncio.current_task()
+    cancelling = getattr(task, "cancelling", None)
+    return bool(cancelling and cancelling())
+
+
+def is_throttle_error(message):
+    """Heuristic check for rate-limit responses in an engine error string."""
+    text = str(message).lower()
+    return "429" in text or "too many" in text or "throttl" in text
+
+
+class SentenceResult:
+    """Outcome of one sentence in a batch run."""
+    __slots__ = ("index", "sentence", "path", "error", "attempts", "elapsed")
+
+    def __init__(self, index, sentence, path=None, error=None, attempts=0, elapsed=0.0):
+        self.index = index
+        self.sentence = sentence
+        self.path = path
+        self.error = error
+        self.attempts = attempts
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        status = "ok" if self.ok else f"error={self.error!r}"
+        return f"SentenceResult(#{self.index}, {status}, attempts={self.attempts})"
+
+
+class BatchResult:
+    """
+    Per-sentence results of process_all_sentences.
+    Truthy only when every sentence succeeded, so it can stand in for the old bool.
+    """
+    def __init__(self, results):
+        self.results = sorted(results, key=lambda r: r.index)
+
+    @property
+    def failed(self):
+        return [r for r in self.results if not r.ok]
+
+    @property
+    def succeeded(self):
+        return [r for r in self.results if r.ok]
+
+    @property
+    def paths(self):
+        return [r.path for r in self.results]
+
+    def __bool__(self):
+        return all(r.ok for r in self.results)
+
+    def __len__(self):
+        return len(self.results)
+
+    def __iter__(self):
+        return iter(self.results)
+
+    def __repr__(self):
+        return f"BatchResult(total={len(self.results)}, failed={len(self.failed)})"
+
+
+class SchedulingTicket:
+    """
+    Handle for one scheduled request. The priority may be raised while the request
+    is still waiting (AdaptiveConcurrencyLimiter.promote); `future` resolves to the
+    request's result so duplicate callers can wait on it.
+    """
+    __slots__ = ("priority", "seq", "future", "_entry")
+    _counter = itertools.count()
+
+    def __init__(self, priority=PRIORITY_BACKGROUND):
+        self.priority = priority
+        self.seq = next(self._counter)
+        self.future = concurrent.futures.Future()
+        self._entry = None
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD in-flight window for network synthesis requests.
+
+    - success with latency near the observed baseline: window += 1 / window
+    - success with inflated latency (server queueing): window -= 1 / window
+    - failure: window *= decrease_factor
+    - throttling: window *= throttle_factor and new requests pause for cooldown seconds
+
+    Waiters are ordered by (priority, arrival); interactive requests may exceed
+    the window by interactive_headroom slots.
+    """
+    def __init__(self, initial=4, minimum=1, maximum=16, latency_tolerance=2.0,
+                 decrease_factor=0.75, throttle_factor=0.5, cooldown=2.0,
+                 interactive_headroom=1):
+        self.minimum = max(1, int(minimum))
+        self.maximum = max(self.minimum, int(maximum))
+        self.window = float(min(max(initial, self.minimum), self.maximum))
+        self.latency_tolerance = latency_tolerance
+        self.decrease_factor = decrease_factor
+        self.throttle_factor = throttle_factor
+        self.cooldown = cooldown
+        self.interactive_headroom = max(0, int(interactive_headroom))
+
+        self.in_flight = 0
+        self.baseline_latency = None
+        self._lock = threading.Lock()
+        self._waiters = []  # heap of [priority, seq, loop, future, ticket]
+        self._pause_until = 0.0
+
+    @property
+    def limit(self):
+        return max(self.minimum, int(self.window))
+
+    def _has_slot(self, priority):
+        headroom = self.interactive_headroom if priority <= PRIORITY_INTERACTIVE else 0
+        return self.in_flight < self.limit + headroom
+
+    async def acquire(self, priority=PRIORITY_BACKGROUND, ticket=None):
+        """
+        Waits for a free slot in the window.
+
+        Args:
+            priority: PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND, ...
+            ticket: Optional SchedulingTicket so the wait can be promoted later.
+        """
+        loop = asyncio.get_running_loop()
+        ticket = ticket or SchedulingTicket(priority)
+        ticket.priority = min(ticket.priority, priority)
+        with self._lock:
+            ahead = self._waiters and self._waiters[0][0] <= ticket.priority
+            if self._has_slot(ticket.priority) and not ahead:
+                self.in_flight += 1
+                fut = None
+            else:
+                fut = loop.create_future()
+                entry = [ticket.priority, ticket.seq, loop, fut, ticket]
+                ticket._entry = entry
+                heapq.heappush(self._waiters, entry)
+
+        if fut is not None:
+            try:
+                await fut
+            except asyncio.CancelledError:
+                with self._lock:
+                    ticket._entry = None
+                    if entry in self._waiters:
+                        self._waiters.remove(entry)
+                        heapq.heapify(self._waiters)
+                        granted = False
+                    else:
+                        granted = fut.done() and not fut.cancelled()
+                if granted:
+                    self.abandon()
+                raise
+
+        delay = self._pause_until - time.monotonic()
+        if delay > 0 and ticket.priority > PRIORITY_INTERACTIVE:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self.abandon()
+                raise
+
+    def promote(self, ticket, priority):
+        """Raises the priority of a waiting (or future) request."""
+        with self._lock:
+            if priority >= ticket.priority:
+                return
+            ticket.priority = priority
+            entry = ticket._entry
+            if entry is not None and entry in self._waiters:
+                entry[0] = priority
+                heapq.heapify(self._waiters)
+            self._wake_locked()
+
+    def release(self, success=True, latency=None, throttled=False):
+        """Frees a slot and adapts the window from the request outcome."""
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            if throttled:
+                self.window = max(self.minimum, self.window * self.throttle_factor)
+                self._pause_until = time.monotonic() + self.cooldown
+            elif not success:
+                self.window = max(self.minimum, self.window * self.decrease_factor)
+            elif latency is not None:
+                if self.baseline_latency is None:
+                    self.baseline_latency = latency
+                else:
+                    # Slowly rising minimum so one lucky response does not pin the baseline
+                    self.baseline_latency = min(latency, self.baseline_latency * 1.02)
+                if latency > self.baseline_latency * self.latency_tolerance:
+                    self.window = max(self.minimum, self.window - 1.0 / self.window)
+                else:
+                    self.window = min(self.maximum, self.window + 1.0 / self.window)
+            self._wake_locked()
+
+    def abandon(self):
+        """Gives back a slot without counting it as a request outcome."""
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            self._wake_locked()
+
+    def _wake_locked(self):
+        while self._waiters and self._has_slot(self._waiters[0][0]):
+            _, _, loop, fut, ticket = heapq.heappop(self._waiters)
+            ticket._entry = None
+            self.in_flight += 1
+            try:
+                loop.call_soon_threadsafe(self._grant, fut)
+            except RuntimeError:
+                # Waiter's loop is already closed
+                self.in_flight -= 1
+
+    def _grant(self, fut):
+        if fut.done():
+            # Waiter was cancelled after being picked; hand the slot on
+            self.abandon()
+        else:
+            fut.set_result(None)
+
+
+class SingleFlight:
+    """
+    Registry of in-flight calls keyed by cache path.
+
+    The first caller for a key runs the work; callers arriving while it runs
+    await the same result instead of repeating it. Results are shared through
+    concurrent.futures.Future objects, so callers may live on different threads
+    and event loops (e.g. the sync single-sentence entry point and a batch).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def is_running(self, key):
+        with self._lock:
+            return key in self._calls
+
+    async def run(self, key, factory):
+        """
+        Runs factory() for key unless an identical call is already in flight.
+
+        Args:
+            key: Deduplication key (the cache path).
+            factory: Zero-argument callable returning the coroutine to run.
+        """
+        while True:
+            with self._lock:
+                shared = self._calls.get(key)
+                if shared is None:
+                    shared = concurrent.futures.Future()
+                    self._calls[key] = shared
+                    owner = True
+                else:
+                    owner = False
+
+            if owner:
+                return await self._run_owner(key, shared, factory)
+
+            try:
+                # shield: a waiter giving up must not cancel the owner's work
+                return await asyncio.shield(asyncio.wrap_future(shared))
+            except asyncio.CancelledError:
+                if not shared.cancelled() or current_task_cancelling():
+                    raise
+                # The owner was cancelled but this caller still wants the result: retry
+
+    async def _run_owner(self, key, shared, factory):
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            self._finish(key)
+            shared.cancel()
+            raise
+        except BaseException as e:
+            self._finish(key)
+            shared.set_exception(e)
+            raise
+        self._finish(key)
+        shared.set_result(result)
+        return result
+
+    def _finish(self, key):
+        with self._lock:
+            self._calls.pop(key, None)
+
+
+class SynthesisScope:
+    """
+    Cancellation scope for synthesis work belonging to one configuration.
+
+    Futures returned by TTSEngine.submit() are attached to the scope; cancel()
+    cancels all of them (queued requests leave the limiter, running edge-tts calls
+    are interrupted and their partial files removed). Work submitted after the
+    scope was cancelled is cancelled immediately. Thread-safe.
+    """
+    def __init__(self, name=""):
+        self.name = name
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._futures = set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def attach(self, future):
+        """Tracks a concurrent.futures.Future for cancellation."""
+        with self._lock:
+            cancelled = self._cancelled
+            if not cancelled:
+                self._futures.add(future)
+        if cancelled:
+            future.cancel()
+            return
+        # Outside the lock: a future that is already done runs _discard right here
+        future.add_done_callback(self._discard)
+
+    def cancel(self):
+        """Cancels every attached future; returns the number that were still pending."""
+        with self._lock:
+            self._cancelled = True
+            futures, self._futures = self._futures, set()
+        return sum(1 for f in futures if f.cancel())
+
+    def _discard(self, future):
+        with self._lock:
+            self._futures.discard(future)
+
+    def __repr__(self):
+        state = "cancelled" if self._cancelled else f"{len(self._futures)} pending"
+        return f"SynthesisScope({self.name!r}, {state})"
@@ -0,0 +1,183 @@
+# -*- coding:utf-8 -*-
+"""
+Pitch-preserving time-stretch for local speed changes.
+
+A rate-0 render is decoded once and played faster or slower with a phase
+vocoder: the STFT frames are resampled in time, magnitudes are interpolated
+and phases re-accumulated from each bin's instantaneous frequency, so the
+pitch stays the same.
+
+Phases are locked to spectral peaks (identity phase locking, Laroche and
+Dolson): only peak bins advance their phase; the bins around a peak keep the
+phase offset they had to it in the analysis frame. Without this the bins of
+one partial drift apart and partly cancel, which makes the result quiet and
+phasey. At onsets the phases restart from the analysis frame, so attacks stay
+sharp. Peak picking and onset detection are vectorized over frames with NumPy;
+only the phase accumulation runs frame by frame.
+
+Optional dependencies: numpy and miniaudio (MP3 decoding). Without them
+TIME_STRETCH_AVAILABLE is False and callers keep synthesizing each rate.
+The functions are module-level so they can run in a ProcessPoolExecutor.
+"""
+import os
+import wave
+
+from .shared_cache import partial_path
+
+TIME_STRETCH_AVAILABLE = False
+try:
+    import numpy as np
+    import miniaudio
+    TIME_STRETCH_AVAILABLE = True
+except ImportError:
+    np = None
+    miniaudio = None
+
+# ~43 ms analysis window, 1/4 overlap hop (at 24 kHz)
+N_FFT = 1024
+HOP = 256
+# Floor of the overlap-add window sum, relative to its full-overlap value
+NORM_FLOOR = 0.5
+# A frame is an onset when its spectral flux exceeds this share of its magnitude sum
+ONSET_FLUX_RATIO = 0.3
+# Frames quieter than this share of the loudest frame are never onsets
+ONSET_MIN_LEVEL = 1e-3
+
+
+def rate_to_speed(rate):
+    """Maps an edge-tts rate in percent (e.g. +20) to a playback speed factor (1.2)."""
+    return max(0.1, 1.0 + float(rate) / 100.0)
+
+
+def decode_mp3(path):
+    """
+    Decodes an MP3 file (or MP3 bytes) to mono float32 samples in [-1, 1].
+
+    Returns:
+        tuple: (samples: np.ndarray, sample_rate: int)
+    """
+    if isinstance(path, (bytes, bytearray)):
+        decoded = miniaudio.decode(bytes(path), output_format=miniaudio.SampleFormat.SIGNED16, nchannels=1)
+    else:
+        decoded = miniaudio.decode_file(path, output_format=miniaudio.SampleFormat.SIGNED16, nchannels=1)
+    samples = np.frombuffer(decoded.samples, dtype=np.int16).astype(np.float32) / 32768.0
+    return samples, decoded.sample_rate
+
+
+def write_wav(path, samples, sample_rate):
+    """Writes mono float samples as 16-bit PCM WAV (temporary file, then renamed)."""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767.0).astype("<i2")
+    tmp_path = partial_path(path)
+    try:
+        with wave.open(tmp_path, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(sample_rate)
+            wav.writeframes(pcm.tobytes())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def _stft(samples, window):
+    padded = np.pad(samples, N_FFT // 2, mode="reflect")
+    if len(padded) < N_FFT:
+        padded = np.pad(padded, (0, N_FFT - len(padded)))
+    frames = np.lib.stride_tricks.sliding_window_view(padded, N_FFT)[::HOP]
+    return np.fft.rfft(frames * window, axis=1)
+
+
+def _istft(spec, window, length):
+    frames = np.fft.irfft(spec, n=N_FFT, axis=1) * window
+    positions = (np.arange(len(frames)) * HOP)[:, None] + np.arange(N_FFT)[None, :]
+    out = np.zeros(N_FFT + HOP * (len(frames) - 1))
+    norm = np.zeros_like(out)
+    np.add.at(out, positions, frames)
+    np.add.at(norm, positions, np.broadcast_to(window ** 2, frames.shape))
+    # Where frames only partly overlap (the tail of a slowed-down render) the
+    # window sum is near zero; flooring it fades those samples out instead of
+    # amplifying them into clicks
+    out /= np.maximum(norm, norm.max() * NORM_FLOOR)
+    out = out[N_FFT // 2:]
+    return out[:length] if len(out) >= length else np.pad(out, (0, length - len(out)))
+
+
+def _onsets(magnitude):
+    """Analysis frames where the spectrum rises sharply (speech onsets, start after silence)."""
+    level = magnitude.sum(axis=1)
+    flux = np.maximum(np.diff(magnitude, axis=0, prepend=0.0), 0.0).sum(axis=1)
+    return (flux > ONSET_FLUX_RATIO * level) & (level > ONSET_MIN_LEVEL * level.max())
+
+
+def _nearest_peaks(magnitude):
+    """For every frame and bin, the index of the nearest spectral peak of that frame."""
+    n_bins = magnitude.shape[1]
+    bins = np.arange(n_bins)
+    peaks = np.zeros(magnitude.shape, dtype=bool)
+    peaks[:, 1:-1] = (magnitude[:, 1:-1] > magnitude[:, :-2]) & (magnitude[:, 1:-1] >= magnitude[:, 2:])
+    below = np.maximum.accumulate(np.where(peaks, bins, -n_bins), axis=1)
+    above = np.minimum.accumulate(np.where(peaks, bins, 2 * n_bins)[:, ::-1], axis=1)[:, ::-1]
+    nearest = np.where(bins - below <= above - bins, below, above)
+    # Frames without peaks (silence): every bin advances on its own
+    return np.where((nearest < 0) | (nearest >= n_bins), bins, nearest)
+
+
+def _phase_vocoder(spec, speed):
+    n_frames, n_bins = spec.shape
+    steps = np.arange(0, n_frames - 1, speed)
+    steps = steps[steps < n_frames - 1]  # float arange may overshoot the end
+    left = steps.astype(int)
+    frac = (steps - left)[:, None]
+    cur, nxt = spec[left], spec[left + 1]
+
+    magnitude = (1.0 - frac) * np.abs(cur) + frac * np.abs(nxt)
+    analysis_phase = np.angle(cur)
+    expected = 2.0 * np.pi * HOP * np.arange(n_bins) / N_FFT
+    deviation = np.angle(nxt) - analysis_phase - expected
+    deviation -= 2.0 * np.pi * np.round(deviation / (2.0 * np.pi))
+    advance = expected + deviation
+    nearest = _nearest_peaks(magnitude)
+    # Restart at the first output frame reaching an onset (slowed down, frames repeat)
+    onset_count = np.cumsum(_onsets(np.abs(spec)))[left]
+    restart = np.diff(onset_count, prepend=-1) > 0
+
+    phase = np.empty_like(magnitude)
+    for t in range(len(steps)):
+        if restart[t]:
+            phase[t] = analysis_phase[t]
+            continue
+        peak = nearest[t]
+        peak_phase = phase[t - 1, peak] + advance[t - 1, peak]
+        phase[t] = peak_phase + analysis_phase[t] - analysis_phase[t, peak]
+    return magnitude * np.exp(1j * phase)
+
+
+def time_stretch(samples, speed):
+    """
+    Changes the tempo of samples by speed (>1 faster, <1 slower) keeping the pitch.
+
+    Returns:
+        np.ndarray: about len(samples) / speed samples.
+    """
+    if abs(speed - 1.0) < 1e-3 or len(samples) == 0:
+        return samples
+    window = np.hanning(N_FFT + 1)[:-1]
+    spec = _stft(samples, window)
+    if len(spec) < 2:
+        return samples
+    stretched = _phase_vocoder(spec, speed)
+    return _istft(stretched, window, int(round(len(samples) / speed))).astype(np.float32)
+
+
+def stretch_file(source_path, target_path, speed):
+    """
+    Decodes source_path (MP3 file or bytes), time-stretches it and writes
+    target_path (WAV). Runs in a worker process.
+
+    Returns:
+        str: target_path
+    """
+    samples, sample_rate = decode_mp3(source_path)
+    write_wav(target_path, time_stretch(samples, speed), sample_rate)
+    return target_path
@@ -0,0 +1,176 @@
+# -*- coding:utf-8 -*-
+"""
+Shared outbound transport for the TTS and OCR engines.
+
+- One TLS context, built once from the certifi bundle (falls back to the system
+  store). Parsing the CA file costs several milliseconds and used to happen for
+  every edge-tts connection.
+- aiohttp connectors for edge-tts, configured in one place (shared TLS context,
+  DNS cache, keep-alive, per-host connection limit).
+- Per-host concurrency limits for blocking clients such as the Baidu OCR SDK.
+
+Both engines take the process-wide instance from get_transport().
+"""
+import ssl
+import threading
+from contextlib import contextmanager
+
+try:
+    import certifi
+except ImportError:
+    certifi = None
+
+try:
+    import aiohttp
+except ImportError:  # edge-tts depends on aiohttp; without it requests use their own sessions
+    aiohttp = None
+
+# Default per-host limits (simultaneous connections / calls; 0 = unlimited)
+HOST_LIMITS = {
+    "speech.platform.bing.com": 16,
+    "aip.baidubce.com": 2,
+}
+
+# Seconds a DNS answer is reused by the aiohttp connectors
+DNS_TTL = 300
+# Seconds an idle keep-alive connection stays in the pool
+KEEPALIVE_TIMEOUT = 30.0
+
+# The unpatched factory, so the shared context never depends on import order
+_create_default_context = ssl.create_default_context
+
+
+def _build_ssl_context():
+    if certifi is not None:
+        try:
+            return _create_default_context(cafile=certifi.where())
+        except (OSError, ssl.SSLError) as e:
+            print(f"Warning: Failed to load certifi CA bundle, using system store: {e}")
+    return _create_default_context()
+
+
+if aiohttp is not None:
+    class SharedConnector(aiohttp.TCPConnector):
+        """
+        TCPConnector that ignores close() from the short-lived sessions using it
+        (edge-tts opens and closes one ClientSession per request).
+        Call shutdown() to really close it.
+        """
+        async def close(self):
+            pass
+
+        async def shutdown(self):
+            result = super().close()
+            if hasattr(result, "__await__"):
+                await result
+
+        def idle_connections(self, host):
+            """Idle keep-alive connections pooled for host, or None if the pool cannot be inspected."""
+            # aiohttp keeps no public count; _conns maps ConnectionKey -> idle connections
+            pools = getattr(self, "_conns", None)
+            if pools is None:
+                return None
+            return sum(len(pool) for key, pool in pools.items() if getattr(key, "host", None) == host)
+
+
+class _SharedContextSsl:
+    """
+    Stand-in for the ssl module inside edge-tts: create_default_context() returns
+    the transport's context instead of parsing the CA bundle again. Everything
+    else is forwarded to ssl.
+    """
+    def __init__(self, transport):
+        self._transport = transport
+
+    def create_default_context(self, purpose=ssl.Purpose.SERVER_AUTH, *, cafile=None, capath=None, cadata=None):
+        default_bundle = cafile is None or (certifi is not None and cafile == certifi.where())
+        if purpose == ssl.Purpose.SERVER_AUTH and default_bundle and capath is None and cadata is None:
+            return self._transport.ssl_context
+        return _create_default_context(purpose, cafile=cafile, capath=capath, cadata=cadata)
+
+    def __getattr__(self, name):
+        return getattr(ssl, name)
+
+
+class Transport:
+    """Outbound network settings and limits shared by every engine in the process."""
+    def __init__(self, host_limits=None, dns_ttl=DNS_TTL, keepalive_timeout=KEEPALIVE_TIMEOUT):
+        self.host_limits = dict(HOST_LIMITS if host_limits is None else host_limits)
+        self.dns_ttl = dns_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self._lock = threading.Lock()
+        self._ssl_context = None
+        self._host_slots = {}
+
+    @property
+    def ssl_context(self):
+        """The shared client TLS context (built on first use)."""
+        with self._lock:
+            if self._ssl_context is None:
+                self._ssl_context = _build_ssl_context()
+            return self._ssl_context
+
+    def create_connector(self, host):
+        """
+        Creates a SharedConnector for requests to host on the running event loop,
+        or None if aiohttp is unavailable.
+        """
+        if aiohttp is None:
+            return None
+        return SharedConnector(
+            ssl=self.ssl_context,
+            ttl_dns_cache=self.dns_ttl,
+            keepalive_timeout=self.keepalive_timeout,
+            limit=0,
+            limit_per_host=self.host_limits.get(host, 0),
+        )
+
+    def use_for_edge_tts(self):
+        """
+        Makes edge-tts use the shared TLS context. edge-tts builds a context per
+        request (ssl.create_default_context with the certifi bundle) and offers
+        no parameter for it, so its module reference to ssl is redirected; the
+        ssl module itself stays untouched for the rest of the process.
+
+        Returns:
+            bool: True if edge-tts uses the shared context.
+        """
+        try:
+            from edge_tts import communicate
+        except ImportError:
+            return False
+        current = getattr(communicate, "ssl", None)
+        if current is None or isinstance(current, _SharedContextSsl):
+            # Older edge-tts leaves TLS to the connector, which already uses the shared context
+            return True
+        if current is not ssl:
+            return False
+        communicate.ssl = _SharedContextSsl(self)
+        return True
+
+    @contextmanager
+    def host_slot(self, host):
+        """Holds one of host's concurrency slots (blocking) for the duration of the block."""
+        limit = self.host_limits.get(host, 0)
+        if limit <= 0:
+            yield
+            return
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(limit)
+        with slot:
+            yield
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport():
+    """Returns the process-wide Transport."""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = Transport()
+        return _transport
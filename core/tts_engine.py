@@ -1,23 +1,74 @@
 # -*- coding:utf-8 -*-
 import os
 import sys
-import re
 import hashlib
 import asyncio
 import edge_tts
 import time
-import shutil
+import threading
+import inspect
+import contextlib
+import concurrent.futures
+
+from .audio_cache import CACHE_BUDGET_BYTES, CacheBudget
+from .audio_stream import GrowingAudioBuffer
+from .cache_manifest import CacheManifest, parse_cache_name
+from .cache_pack import CACHE_PACKS_DIR, CachePacks
+from .batch_journal import BatchJournal, job_key
+from .chunk_planner import MAX_CHARS, TARGET_CHARS, SynthesisChunk, plan_chunks
+from .connection_manager import ConnectionManager
+from .transport import get_transport
+from .mp3_utils import audio_frames, concat_mp3_files, frames_duration, slice_mp3
+from .time_stretch import TIME_STRETCH_AVAILABLE, rate_to_speed, stretch_file
+from .segment_store import SegmentStore, content_key
+from .sentence_search import SEARCHABLE_KINDS, SearchHit, SentenceSearchIndex
+from .shared_cache import ENTRY_LOCK_TIMEOUT_S, INSTANCES_DIR, LOCKS_DIR, SharedCache, partial_path
+from .sentence_splitter import split_sentences
+from .sentence_index import build_sentence_ranges, load_sentence_index, write_sentence_index
+from .synthesis_scheduler import (
+    PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, PRIORITY_SPECULATIVE, AdaptiveConcurrencyLimiter, BatchResult,
+    SchedulingTicket, SentenceResult, SingleFlight, SynthesisScope, current_task_cancelling,
+    is_throttle_error
+)
 
 # --- Configuration and Globals ---
 VOICE_DICT = {
-    "Mandarin Female (Xiaoyi)": "zh-CN-XiaoyiNeural",
-    "Mandarin Female (Xiaoxiao)": "zh-CN-XiaoxiaoNeural",
-    "Mandarin Female (Yunxi)": "zh-CN-YunxiNeural",
-    "Mandarin Male (Yunjian)": "zh-CN-YunjianNeural",
-    "Mandarin Male (YunyangNeural)": "zh-CN-YunyangNeural",
+    "Mandarin Female (Xiaoyi)": "zh-CN-XiaoyiNeural",  # Cartoon, Novel
+    "Mandarin Female (Xiaoxiao)": "zh-CN-XiaoxiaoNeural",  # News, Novel
+    "Mandarin Male (Yunxi)": "zh-CN-YunxiNeural",  # Novel
+    "Mandarin Male (Yunjian)": "zh-CN-YunjianNeural",  # Sports, Novel
+    "Mandarin Male (Yunxia)": "zh-CN-YunxiaNeural",  # Cartoon, Novel
+    "Mandarin Male (Yunyang)": "zh-CN-YunyangNeural",  # News
+    "Northeast Mandarin Female (Xiaobei)": "zh-CN-liaoning-XiaobeiNeural",  # Dialect
+    "Shaanxi Mandarin Female (Xiaoni)": "zh-CN-shaanxi-XiaoniNeural",  # Dialect
 }
 
 AUDIO_DIR = "audio_cache"
+# Journals of unfinished batch jobs, inside the audio directory
+JOBS_DIR = "jobs"
+# Pack files of the optional packed segment store, inside the audio directory
+PACKS_DIR = "packs"
+# Cache entry kinds whose audio is the same segment in the packed store (see segment_store.content_key)
+STORE_SHARED_KINDS = ("single", "full")
+# Seconds between checks for changes other instances made to a shared cache's index
+SHARED_REFRESH_S = 5.0
+
+# Upper bound for simultaneous edge-tts requests during batch processing
+MAX_CONCURRENCY = 8
+# Attempts per sentence before a batch reports it as failed
+MAX_ATTEMPTS = 3
+
+# Worker processes for local time-stretching (CPU bound)
+STRETCH_WORKERS = max(1, min(2, (os.cpu_count() or 1) - 1))
+
+# Returned by the sync wrappers when their scope was cancelled
+CANCELLED_ERROR = "Error: Cancelled (superseded by a newer request)"
+
+# edge-tts >= 7 emits SentenceBoundary by default and needs boundary= to report words
+try:
+    _COMMUNICATE_SUPPORTS_BOUNDARY = "boundary" in inspect.signature(edge_tts.Communicate).parameters
+except (TypeError, ValueError):
+    _COMMUNICATE_SUPPORTS_BOUNDARY = False
 
 # Ensure the cache directory exists at initialization
 os.makedirs(AUDIO_DIR, exist_ok=True)
@@ -27,7 +78,10 @@ class TTSEngine:
     Handles all core Text-to-Speech logic using the edge-tts library.
     Manages text splitting, caching, and audio generation.
     """
-    def __init__(self, audio_dir=AUDIO_DIR, clear_cache_on_start=True):
+    def __init__(self, audio_dir=AUDIO_DIR, clear_cache_on_start=False,
+                 max_concurrency=MAX_CONCURRENCY, max_attempts=MAX_ATTEMPTS, group_chars=TARGET_CHARS,
+                 split_chars=MAX_CHARS, transport=None, cache_budget_bytes=CACHE_BUDGET_BYTES,
+                 packed_store=False, shared_cache_dir=None, pack_dirs=()):
         if getattr(sys, 'frozen', False):
             # 打包后的环境：建议指向用户库或文档目录
             user_data_dir = os.path.expanduser("~/Library/Application Support/MandarinTTS")
@@ -36,68 +90,477 @@ class TTSEngine:
             # 开发环境：使用当前目录
             self._audio_dir = AUDIO_DIR
 
+        # Read-only cache packs (see cache_pack) are mounted from the cache_packs directory
+        # next to the local audio cache and from pack_dirs
+        self.packs = CachePacks([os.path.join(os.path.dirname(self._audio_dir), CACHE_PACKS_DIR), *pack_dirs])
+
+        if shared_cache_dir:
+            # Cache directory shared with other instances (see shared_cache)
+            self._audio_dir = shared_cache_dir
+
         if not os.path.exists(self._audio_dir):
             os.makedirs(self._audio_dir, exist_ok=True)
+        self.shared = SharedCache(self._audio_dir) if shared_cache_dir else None
+        if self.shared is not None and packed_store:
+            print("Warning: The packed segment store is per-process; not used with a shared cache")
+            packed_store = False
+        # Set by shutdown; stops the shared cache refresh
+        self._closed = threading.Event()
  
-        # Clear cache on initialization if requested
+        # Shared across batches so the learned window carries over between runs
+        self._limiter = AdaptiveConcurrencyLimiter(
+            initial=min(4, max_concurrency), maximum=max_concurrency)
+        self._max_attempts = max(1, int(max_attempts))
+        # Batch request sizing (see chunk_planner): consecutive sentences are combined up to
+        # group_chars characters, sentences longer than split_chars are sub-split (0 disables)
+        self.group_chars = max(0, int(group_chars))
+        self.split_chars = max(0, int(split_chars))
+        # Deduplicates concurrent synthesis of the same cache path across threads and loops
+        self._single_flight = SingleFlight()
+        # Scheduled sentences (queued or running) by cache path, for promotion and dedup
+        self._queued = {}
+        # Buffers of renders in progress by cache path, so late listeners can join a stream
+        self._streams = {}
+        # Outbound TLS/DNS/limits shared with the OCR engine
+        self.transport = transport or get_transport()
+        if not self.transport.use_for_edge_tts():
+            print("Warning: edge-tts builds its own TLS context per request (shared context not applied)")
+        # Shared edge-tts connector with a pool of pre-warmed connections
+        self._connections = ConnectionManager(self.transport)
+        # edge-tts requests sent and audio bytes received since start (budgets, see prewarm)
+        self.requests_sent = 0
+        self.bytes_received = 0
+
+        # Process pool for local time-stretch jobs (started lazily) and jobs in progress by target path
+        self._stretch_pool = None
+        self._stretch_jobs = {}
+        self._stretch_lock = threading.Lock()
+
+        # Persistent background event loop (started lazily by _get_loop)
+        self._loop = None
+        self._loop_thread = None
+        self._loop_lock = threading.Lock()
+
+        # In-memory index of the cache files (persisted in SQLite); lookups do not touch the disk
+        self.manifest = CacheManifest(self._audio_dir, shared=self.shared is not None)
+        # Optional packed store (see segment_store): sentence segments are appended to pack files
+        # instead of being written as one small file each
+        self.store = SegmentStore(os.path.join(self._audio_dir, PACKS_DIR)) if packed_store else None
+        # The cache persists across runs; LRU eviction keeps it under cache_budget_bytes (0 = unlimited)
+        self.cache = CacheBudget(self.manifest, cache_budget_bytes, on_evict=self._evict_segment)
+        # Substring search over the texts of cached entries, kept up to date through the manifest
+        self.search_index = SentenceSearchIndex()
+        self.manifest.subscribe(self._on_manifest_change)
+
+        # Clear cache on initialization if requested (a shared cache only when no other instance
+        # uses it); the index is checked against the directory and the budget enforced in the background
         if clear_cache_on_start:
             self._clear_cache()
+        threading.Thread(target=self._maintain_cache, name="AudioCacheMaintenance", daemon=True).start()
     
-    def _clear_cache(self):
+    # --- Background Event Loop ---
+    def _get_loop(self):
+        """Returns the engine's event loop, starting its thread on first use."""
+        with self._loop_lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def _run():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                self._loop_thread = threading.Thread(target=_run, name="TTSEngineLoop", daemon=True)
+                self._loop_thread.start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    def submit(self, coro, scope=None):
+        """
+        Schedules a coroutine on the engine's long-lived event loop.
+        Safe to call from any thread.
+
+        Args:
+            scope: Optional SynthesisScope; cancelling it cancels this work.
+
+        Returns:
+            concurrent.futures.Future: resolves to the coroutine's result.
+        """
+        loop = self._get_loop()
+        if threading.current_thread() is self._loop_thread:
+            coro.close()
+            raise RuntimeError("TTSEngine.submit() must not be called from the engine loop; await the coroutine instead.")
+        if scope is not None and scope.cancelled:
+            coro.close()
+            future = concurrent.futures.Future()
+            future.cancel()
+            return future
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        if scope is not None:
+            scope.attach(future)
+        return future
+
+    def submit_batch(self, sentences, voice, rate, scope=None, resumable=False):
+        """
+        Schedules process_all_sentences; the future resolves to a BatchResult.
+
+        With resumable=True the job is journaled (see open_journal): if it is cancelled,
+        fails or the app exits, the next batch over the same sentences continues where
+        this one stopped. The journal is deleted once every sentence succeeded.
+        """
+        if not resumable:
+            return self.submit(self.process_all_sentences(sentences, voice, rate), scope=scope)
+        journal = self.open_journal(sentences, voice, rate)
+        future = self.submit(self.process_all_sentences(sentences, voice, rate, journal=journal), scope=scope)
+        future.add_done_callback(lambda f: self._close_journal(journal, f))
+        return future
+
+    @staticmethod
+    def _close_journal(journal, future):
+        if not future.cancelled() and future.exception() is None and future.result():
+            journal.remove()
+        else:
+            journal.close()
+
+    def submit_sentences(self, sentences, voice, rate, scope=None):
+        """
+        Schedules every sentence as its own request, in order, and returns one future
+        per sentence (resolving to a SentenceResult). The first sentence runs at
+        interactive priority so sequential playback can start as soon as possible;
+        the rest follow through the background window in order.
+        """
+        return [
+            self.submit(self._scheduled_sentence(
+                i, s, voice, rate,
+                priority=PRIORITY_INTERACTIVE if i == 0 else PRIORITY_BACKGROUND), scope=scope)
+            for i, s in enumerate(sentences)
+        ]
+
+    def prewarm(self):
+        """
+        Opens warm connections to the edge-tts service in the background, so the
+        next synthesis request does not pay for DNS, TCP and TLS setup.
+
+        Returns:
+            concurrent.futures.Future: resolves to the number of connections warmed.
+        """
+        return self.submit(self._connections.prewarm())
+
+    def submit_speculative(self, sentences, voice, rate, scope=None, budget=None):
+        """
+        Pre-renders sentences the user has not submitted yet at PRIORITY_SPECULATIVE,
+        so they only use slots nothing else is waiting for. Sentences already cached
+        or queued are skipped and do not count against budget (the maximum number
+        of new requests). A later batch or single request for the same sentence
+        joins the speculative request instead of starting another.
+
+        Returns:
+            list: concurrent.futures.Future per scheduled sentence (SentenceResult).
+        """
+        futures = []
+        planned = set()
+        for i, s in enumerate(sentences):
+            if budget is not None and len(futures) >= budget:
+                break
+            path = self._get_audio_file_path(s, voice, rate, prefix="single")
+            if not s.strip() or path in planned or path in self._queued or self._has_audio(path):
+                continue
+            planned.add(path)
+            futures.append(self.submit(
+                self._scheduled_sentence(i, s, voice, rate, priority=PRIORITY_SPECULATIVE), scope=scope))
+        return futures
+
+    def cached_sentence_count(self, sentences, voice, rate):
+        """Number of sentences whose single_* audio is already cached."""
+        paths = [self._get_audio_file_path(s, voice, rate, prefix="single") for s in sentences]
+        cached = self._cached_subset(paths)
+        return sum(1 for p in paths if p in cached)
+
+    def cache_path(self, sentence, voice, rate):
+        """Cache path of a sentence's single_* audio (whether or not it is cached)."""
+        return self._get_audio_file_path(sentence, voice, rate, prefix="single")
+
+    def estimate_requests(self, sentences, voice, rate):
+        """
+        Number of edge-tts requests a batch over sentences would send now
+        (uncached units of the chunk plan, before retries).
+        """
+        chunks, paths = self._plan_batch_units(sentences, voice, rate, self.group_chars, self.split_chars)
+        cached = self._cached_subset(paths)
+        seen = set()
+        requests = 0
+        for chunk in chunks:
+            todo = {paths[i] for i in chunk.indices
+                    if sentences[i].strip() and paths[i] not in cached and paths[i] not in seen}
+            if todo:
+                seen.update(todo)
+                requests += len(chunk.pieces) if chunk.pieces else 1
+        return requests
+
+    def has_full_audio(self, sentences, voice, rate):
+        """True if a direct full-text render of the sentences is cached."""
+        return self._has_audio(self._get_audio_file_path("".join(sentences), voice, rate, prefix="full"))
+
+    def new_scope(self, name=""):
+        """Creates a cancellation scope for one text/voice/rate configuration."""
+        return SynthesisScope(name)
+
+    def shutdown(self):
+        """Cancels pending work and stops the background event loop."""
+        self._closed.set()
+        with self._stretch_lock:
+            pool, self._stretch_pool = self._stretch_pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        with self._loop_lock:
+            loop, thread = self._loop, self._loop_thread
+            self._loop = None
+            self._loop_thread = None
+        if loop is None or loop.is_closed():
+            self._close_cache()
+            return
+
+        async def _cancel_all():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self._connections.close()
+
+        try:
+            asyncio.run_coroutine_threadsafe(_cancel_all(), loop).result(timeout=5)
+        except Exception as e:
+            print(f"Warning: Failed to cancel pending TTS tasks: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+        loop.close()
+        self._close_cache()
+
+    def _close_cache(self):
+        self.manifest.flush()
+        if self.shared is not None:
+            self.shared.close()
+
+    def _maintain_cache(self):
+        self._rebuild_search_index()
+        self.manifest.reconcile(keep=self.is_packed)
+        self.cache.sweep_partials()
+        self.cache.request_eviction(force=True)
+        if self.store is not None:
+            self.store.request_compaction()
+        # Shared cache: pick up entries other instances evicted or recorded
+        while self.shared is not None and not self._closed.wait(SHARED_REFRESH_S):
+            self.manifest.refresh()
+
+    # --- Search over Cached Texts ---
+    def search_cached(self, query, limit=50, voice=None, rate=None):
+        """
+        Cached entries (sentences, full texts, cache pack entries) whose text
+        contains query, best match first. Never synthesizes anything; every
+        hit's path is in the cache (see audio_source).
+
+        Returns:
+            list: SearchHit objects.
+        """
+        return self.search_index.search(query, limit=limit, voice=voice, rate=rate)
+
+    def _search_hit(self, name, text, voice_key, rate, kind, last_access=0.0, in_pack=False):
+        if not text or kind not in SEARCHABLE_KINDS:
+            return None
+        try:
+            rate = int(rate)
+        except (TypeError, ValueError):
+            return None
+        # Cache names carry the voice with "-" replaced by "_" (see _get_audio_file_path)
+        return SearchHit(name, os.path.join(self._audio_dir, name), text, voice_key.replace("_", "-"),
+                         rate, kind, last_access, in_pack)
+
+    def _pack_search_hit(self, entry):
+        parsed = parse_cache_name(entry["name"])
+        if parsed is None:
+            return None
+        return self._search_hit(entry["name"], entry.get("text"), parsed[1], parsed[2], parsed[0], in_pack=True)
+
+    def _cache_search_hit(self, entry):
+        return self._search_hit(entry.name, entry.text, entry.voice, entry.rate, entry.kind, entry.last_access)
+
+    def _rebuild_search_index(self):
+        hits = [self._pack_search_hit(entry) for _, entry in self.packs.entries()]
+        hits.extend(self._cache_search_hit(entry) for entry in self.manifest.entries())
+        self.search_index.clear()
+        self.search_index.add_all(hit for hit in hits if hit)
+
+    def _on_manifest_change(self, name, entry):
+        if name is None:
+            # Cleared or reloaded from another instance's changes
+            threading.Thread(target=self._rebuild_search_index, name="SearchIndexRebuild", daemon=True).start()
+            return
+        if entry is not None:
+            hit = self._cache_search_hit(entry)
+            if hit:
+                self.search_index.add(hit)
+            return
+        self.search_index.remove(name)
+        pack_entry = self.packs.entry(name)
+        if pack_entry is not None:
+            # Evicted from the cache, still in a mounted pack
+            hit = self._pack_search_hit(pack_entry)
+            if hit:
+                self.search_index.add(hit)
+
+    @contextlib.asynccontextmanager
+    async def _entry_lock(self, cached_path):
+        """
+        Shared cache: holds the cross-process lock for rendering cached_path, so
+        each entry is synthesized by one instance at a time. No-op otherwise.
+        """
+        if self.shared is None:
+            yield
+            return
+        lock = self.shared.entry_lock(cached_path)
+        if not await lock.acquire_async(timeout=ENTRY_LOCK_TIMEOUT_S):
+            print(f"Warning: Waited {ENTRY_LOCK_TIMEOUT_S:.0f}s for another instance to render "
+                  f"{cached_path}; rendering it here")
+        try:
+            yield
+        finally:
+            # Removed only after publishing: a waiter that got the old file re-checks the cache
+            lock.release(remove=True)
+
+    def is_cached(self, path):
+        """True if path is audio in this engine's cache, as a file or packed (in-memory lookup)."""
+        return bool(path) and self._has_audio(path)
+
+    def _has_audio(self, path):
+        return path in self.packs or self.manifest.contains(path) or self.is_packed(path)
+
+    def _cached_subset(self, paths):
+        """Bulk form of _has_audio: the subset of paths that are cached."""
+        mounted = {p for p in paths if p in self.packs}
+        cached = self.manifest.present([p for p in paths if p not in mounted]) | mounted
+        if self.store is not None:
+            cached.update(p for p in paths if p not in cached and self.is_packed(p))
+        return cached
+
+    # --- Packed Segment Store ---
+    def _store_key(self, path):
+        parsed = parse_cache_name(os.path.basename(path))
+        return content_key(parsed[1], parsed[2], parsed[3]) if parsed else None
+
+    def is_packed(self, path):
+        """True if the audio for cache path lives in the packed store (not as a file)."""
+        return self.store is not None and bool(path) and self._store_key(path) in self.store
+
+    def audio_source(self, path):
+        """
+        The audio of a cache path for reading: a zero-copy memoryview when it is
+        packed, the file in a mounted cache pack when only a pack has it,
+        otherwise the path itself (see mp3_utils.append_mp3_frames).
+        """
+        if self.store is not None:
+            view = self.store.view(self._store_key(path))
+            if view is not None:
+                return view
+        if path in self.packs and self.manifest.get(path) is None:
+            return self.packs.path_for(path)
+        return path
+
+    def open_audio(self, path):
+        """Opens the audio of a cache path as a binary file object (packed or file)."""
+        if self.store is not None:
+            reader = self.store.open(self._store_key(path))
+            if reader is not None:
+                return reader
+        return open(self.audio_source(path), "rb")
+
+    def _read_audio(self, path):
+        """The audio of a cache path as bytes."""
+        source = self.audio_source(path)
+        if not isinstance(source, str):
+            return bytes(source)
+        with open(source, "rb") as fp:
+            return fp.read()
+
+    def _save_audio(self, cached_path, data, text=None, duration_ms=None):
+        """Stores finished audio under cached_path: in the packed store when enabled, else as a file."""
+        if self.store is not None:
+            self.store.put(self._store_key(cached_path), data)
+            self.manifest.add(cached_path, duration_ms=duration_ms, text=text, size=len(data))
+            return
+        tmp_path = partial_path(cached_path)
+        try:
+            with open(tmp_path, "wb") as fp:
+                fp.write(data)
+            os.replace(tmp_path, cached_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        self.manifest.add(cached_path, duration_ms=duration_ms, text=text)
+
+    def _store_file(self, cached_path, text=None, duration_ms=None):
+        """Records a file just written to the cache; with the packed store it is moved into a pack."""
+        if self.store is None:
+            self.manifest.add(cached_path, duration_ms=duration_ms, text=text)
+            return
+        with open(cached_path, "rb") as fp:
+            data = fp.read()
+        self._save_audio(cached_path, data, text, duration_ms)
+        os.unlink(cached_path)
+
+    def _evict_segment(self, path):
+        if self.store is None:
+            return
+        # The single_ entry of a sentence and the full_ render of a one-sentence
+        # text share one segment; it is deleted once neither entry is left
+        parsed = parse_cache_name(os.path.basename(path))
+        if parsed and parsed[0] in STORE_SHARED_KINDS:
+            suffix = os.path.basename(path)[len(parsed[0]):]
+            if any(self.manifest.contains(os.path.join(self._audio_dir, kind + suffix))
+                   for kind in STORE_SHARED_KINDS if kind != parsed[0]):
+                return
+        self.store.delete(self._store_key(path))
+        self.store.request_compaction()
+
+    def clear_cache(self):
         """
-        Clears all cached audio files in the audio directory.
-        Keeps the directory itself intact.
+        Clears all cached audio files (and unfinished job journals) in the audio
+        directory. Keeps the directory itself intact. A shared cache is left
+        alone while other instances are using it.
+
+        Returns:
+            bool: True if the cache was cleared.
         """
+        return self._clear_cache()
+
+    def _clear_cache(self):
+        keep = ()
+        if self.shared is not None:
+            others = self.shared.other_instances()
+            if others:
+                print(f"Warning: Shared cache in use by {others} other instance(s); not cleared")
+                return False
+            keep = (INSTANCES_DIR, LOCKS_DIR)
         try:
-            if os.path.exists(self._audio_dir):
-                for filename in os.listdir(self._audio_dir):
-                    file_path = os.path.join(self._audio_dir, filename)
-                    try:
-                        if os.path.isfile(file_path):
-                            os.unlink(file_path)
-                        elif os.path.isdir(file_path):
-                            shutil.rmtree(file_path)
-                    except Exception as e:
-                        print(f"Warning: Failed to delete {file_path}: {e}")
-                print(f"Cache cleared: {self._audio_dir}")
+            if self.store is not None:
+                self.store.close()
+            self.cache.clear(keep=keep)
+            if self.store is not None:
+                self.store.clear()
+            print(f"Cache cleared: {self._audio_dir}")
+            return True
         except Exception as e:
             print(f"Warning: Failed to clear cache directory: {e}")
+            return False
         
     def text_to_sentences(self, text):
         """
         Splits text into sentences using common Chinese punctuation as delimiters.
+        Single pass over the text (see sentence_splitter); for input arriving in
+        pieces use sentence_splitter.iter_sentences.
         """
-        if not text:
-            return []
-            
-        delimiters = r'[。？！；]'
-        sentences = re.split(delimiters, text)
-        
-        # Clean up and re-append delimiters to the sentence fragment
-        result = []
-        text_to_consume = text 
-        
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if sentence:
-                
-                sentence_start_index = text_to_consume.find(sentence)
-                if sentence_start_index == -1:
-                    continue
-
-                delimiter_search_area = text_to_consume[sentence_start_index + len(sentence):]
-                match = re.search(delimiters, delimiter_search_area)
-                delimiter = match.group(0) if match else ''
-                
-                result.append(sentence + delimiter)
-                
-                if match:
-                    delimiter_end_index = delimiter_search_area.find(delimiter) + len(delimiter)
-                    text_to_consume = delimiter_search_area[delimiter_end_index:]
-                else:
-                    text_to_consume = ""
-             
-        return [s.strip() for s in result if s.strip()]
+        return split_sentences(text)
 
     def _get_safe_text(self, text):
         """
@@ -106,13 +569,166 @@ class TTSEngine:
         normalized_text = "".join(text.split())
         return hashlib.sha1(normalized_text.encode('utf-8')).hexdigest()
 
-    async def _async_generate(self, text, voice, rate, filepath):
+    async def _async_generate(self, text, voice, rate, filepath, buffer=None, boundaries=None):
         """
         The asynchronous core function that calls edge-tts to generate and save audio.
+        Audio is written to a temporary file and moved into place only when complete,
+        so cancelled or failed requests never leave a truncated file in the cache.
+
+        If a GrowingAudioBuffer is given, every audio chunk is also appended to it as
+        it arrives so playback can start before the render is complete.
+        If a boundaries list is given, WordBoundary/SentenceBoundary events are
+        appended to it as (text, offset_ticks, duration_ticks).
         """
         rate_str = f"{rate:+d}%" if isinstance(rate, int) else f"{rate}%"
-        communicate = edge_tts.Communicate(text, voice, rate=rate_str)
-        await communicate.save(filepath)
+        options = {}
+        if boundaries is not None and _COMMUNICATE_SUPPORTS_BOUNDARY:
+            options["boundary"] = "WordBoundary"
+        options.update(self._connections.communicate_options())
+        communicate = edge_tts.Communicate(text, voice, rate=rate_str, **options)
+        self.requests_sent += 1
+        tmp_path = partial_path(filepath)
+        try:
+            with open(tmp_path, "wb") as fp:
+                async for chunk in communicate.stream():
+                    if chunk["type"] == "audio":
+                        fp.write(chunk["data"])
+                        self.bytes_received += len(chunk["data"])
+                        if buffer is not None:
+                            buffer.append(chunk["data"])
+                    elif boundaries is not None and chunk["type"] in ("WordBoundary", "SentenceBoundary"):
+                        boundaries.append((chunk.get("text", ""), chunk["offset"], chunk.get("duration", 0)))
+            os.replace(tmp_path, filepath)
+            if buffer is not None:
+                buffer.finish(filepath)
+            self.cache.request_eviction()
+        except BaseException as e:
+            if buffer is not None:
+                buffer.fail(e)
+            raise
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            # The websocket used up its connection; warm a replacement for the next request
+            self._connections.replenish()
+
+    async def _render_full(self, sentences, voice, rate, cached_path, buffer=None):
+        """
+        Renders the joined sentences into cached_path and records a sentence
+        time index next to it (see sentence_index) from the boundary events.
+        """
+        async with self._entry_lock(cached_path):
+            # Another instance of a shared cache may have published it while we waited
+            if self.shared is not None and self._has_audio(cached_path):
+                return
+            await self._render_full_locked(sentences, voice, rate, cached_path, buffer)
+
+    async def _render_full_locked(self, sentences, voice, rate, cached_path, buffer):
+        boundaries = []
+        text = "".join(sentences)
+        await self._async_generate(text, voice, rate, cached_path, buffer, boundaries)
+        duration_ms = None
+        try:
+            with open(cached_path, "rb") as fp:
+                duration_ms = frames_duration(audio_frames(fp.read())) * 1000
+            ranges = build_sentence_ranges(sentences, boundaries, duration_ms)
+            if ranges:
+                write_sentence_index(cached_path, sentences, ranges, duration_ms)
+            else:
+                print(f"Warning: No boundary events matched; no sentence index for {cached_path}")
+        except Exception as e:
+            print(f"Warning: Failed to write sentence index for {cached_path}: {e}")
+        if len(sentences) == 1:
+            # Same audio as the sentence's single_ segment (one entry in the packed store)
+            self._store_file(cached_path, text=text, duration_ms=duration_ms)
+        else:
+            self.manifest.add(cached_path, duration_ms=duration_ms, text=text)
+
+    def has_sentence_index(self, full_path):
+        """True if full_path has a sentence time index (single sentences can be sliced from it)."""
+        return bool(full_path) and load_sentence_index(full_path) is not None
+
+    def slice_sentence_from_full(self, full_path, sentence_idx, sentence, voice, rate):
+        """
+        Cuts one sentence out of an indexed full-text render into its single_*
+        cache entry, without any network call.
+
+        Returns:
+            str or None: audio_filepath, or None if no usable index exists.
+        """
+        cached_path = self._get_audio_file_path(sentence, voice, rate, prefix="single")
+        if self._has_audio(cached_path):
+            self.manifest.hit(cached_path)
+            return cached_path
+
+        index = load_sentence_index(full_path) if full_path else None
+        if index is None:
+            return None
+        sentences = index["sentences"]
+        if not (0 <= sentence_idx < len(sentences)) or sentences[sentence_idx] != sentence:
+            # The list index may be stale; fall back to locating the text
+            if sentence not in sentences:
+                return None
+            sentence_idx = sentences.index(sentence)
+
+        start_ms, end_ms = index["ranges_ms"][sentence_idx]
+        try:
+            data = self._read_audio(full_path)
+        except OSError as e:
+            print(f"Warning: Failed to read {full_path}: {e}")
+            return None
+        if not self._slice_into_cache(data, start_ms, end_ms, cached_path, sentence):
+            return None
+        print(f"TTS Single Sliced: {cached_path} from {full_path} [{start_ms}-{end_ms} ms]")
+        return cached_path
+
+    def slice_sentences_from_full(self, full_path, items, voice, rate):
+        """
+        Batch form of slice_sentence_from_full: reads the render and its index once.
+
+        Args:
+            items: [(sentence_idx, sentence), ...] positions in the render's sentence list.
+
+        Returns:
+            int: How many of the sentences are in the single_* cache afterwards.
+        """
+        index = load_sentence_index(full_path) if full_path else None
+        data = None
+        available = 0
+        for sentence_idx, sentence in items:
+            cached_path = self._get_audio_file_path(sentence, voice, rate, prefix="single")
+            if self._has_audio(cached_path):
+                available += 1
+                continue
+            if index is None:
+                continue
+            sentences = index["sentences"]
+            if not (0 <= sentence_idx < len(sentences)) or sentences[sentence_idx] != sentence:
+                continue
+            if data is None:
+                try:
+                    data = self._read_audio(full_path)
+                except OSError as e:
+                    print(f"Warning: Failed to read {full_path}: {e}")
+                    index = None
+                    continue
+            start_ms, end_ms = index["ranges_ms"][sentence_idx]
+            if self._slice_into_cache(data, start_ms, end_ms, cached_path, sentence):
+                available += 1
+        print(f"TTS Single Sliced: {available}/{len(items)} sentences available from {full_path}")
+        return available
+
+    def _slice_into_cache(self, data, start_ms, end_ms, cached_path, text=None):
+        """Writes the [start_ms, end_ms) part of MP3 data to cached_path. Returns True on success."""
+        try:
+            segment = slice_mp3(data, start_ms / 1000.0, end_ms / 1000.0)
+            if not segment:
+                return False
+            self._save_audio(cached_path, segment, text=text, duration_ms=end_ms - start_ms)
+            return True
+        except Exception as e:
+            print(f"Warning: Failed to slice audio into {cached_path}: {e}")
+            return False
 
     def _get_audio_file_path(self, text, voice, rate, prefix="full"):
         """Helper to generate consistent audio file paths."""
@@ -121,11 +737,64 @@ class TTSEngine:
         filename = f"{prefix}_{voice_key}_{rate}_{safe_hash}.mp3"
         return os.path.join(self._audio_dir, filename)
         
+    # --- Local Time-Stretch (speed changes without re-synthesis) ---
+    def stretch_audio(self, source_path, rate):
+        """
+        Produces a pitch-preserving tempo change of a rate-0 render locally
+        (see time_stretch). Runs in a process pool; designed to be called
+        synchronously from a worker thread. Concurrent calls for the same
+        output share one job.
+
+        Returns:
+            str: audio_filepath (WAV; source_path itself for rate 0) or Error string.
+        """
+        if not TIME_STRETCH_AVAILABLE:
+            return "Error: Local speed change needs numpy and miniaudio (pip install numpy miniaudio)."
+        if not rate:
+            return source_path
+        source = self.audio_source(source_path) if source_path else None
+        if source is None or (isinstance(source, str) and not os.path.exists(source)):
+            return f"Error: Audio to stretch not found: {source_path}"
+
+        base_name = os.path.splitext(os.path.basename(source_path))[0]
+        target_path = os.path.join(self._audio_dir, f"stretch_{rate:+d}_{base_name}.wav")
+        if self._has_audio(target_path):
+            print(f"TTS Stretch Cache Hit: Found audio at {target_path}")
+            self.manifest.hit(target_path)
+            return target_path
+
+        with self._stretch_lock:
+            job = self._stretch_jobs.get(target_path)
+            if job is None:
+                if self._stretch_pool is None:
+                    self._stretch_pool = concurrent.futures.ProcessPoolExecutor(max_workers=STRETCH_WORKERS)
+                print(f"TTS Stretch Cache Miss: Stretching {source_path} to {rate:+d}%")
+                if not isinstance(source, str):
+                    # Packed segment: the worker process gets the bytes instead of a path
+                    source = bytes(source)
+                job = self._stretch_pool.submit(stretch_file, source, target_path, rate_to_speed(rate))
+                self._stretch_jobs[target_path] = job
+                job.add_done_callback(lambda _: self._stretch_jobs.pop(target_path, None))
+        try:
+            result = job.result()
+        except Exception as e:
+            return f"Error: Time-stretch failed: {str(e)}"
+        self.manifest.add(result)
+        self.cache.request_eviction()
+        return result
+
     # --- Public API for Full Text (Thread 2) ---
-    def generate_full_audio(self, text, voice, rate):
+    def generate_full_audio(self, text, voice, rate, from_segments=False, scope=None):
         """
         Generates the full audio file (or retrieves from cache).
         Designed to be called synchronously from a worker thread.
+
+        With from_segments=True the full text is not sent to edge-tts; instead the
+        per-sentence (single_*) segments are synthesized or reused from cache and
+        joined into one file (see assemble_full_audio).
+
+        If scope is cancelled while generating, CANCELLED_ERROR is returned and no
+        partial file is left in the cache.
         
         Returns:
             tuple: (audio_filepath: str, sentence_list: list)
@@ -134,22 +803,141 @@ class TTSEngine:
             return "Error: Input text is empty.", []
 
         sentences = self.text_to_sentences(text)
+        if from_segments:
+            return self.assemble_full_audio(sentences, voice, rate, scope=scope), sentences
+
         full_text_clean = "".join(sentences)
         
         cached_path = self._get_audio_file_path(full_text_clean, voice, rate, prefix="full")
 
-        if os.path.exists(cached_path):
+        if self._has_audio(cached_path):
             print(f"TTS Full Cache Hit: Found audio at {cached_path}")
+            self.manifest.hit(cached_path)
             return cached_path, sentences
         
         print(f"TTS Full Cache Miss: Generating new audio to {cached_path}")
         
         try:
-            # Synchronously run the async generation
-            asyncio.run(self._async_generate(full_text_clean, voice, rate, cached_path))
+            # Synchronously wait for the generation on the engine loop
+            self.submit(self._single_flight.run(
+                cached_path, lambda: self._render_full(sentences, voice, rate, cached_path)),
+                scope=scope).result()
             return cached_path, sentences
+        except concurrent.futures.CancelledError:
+            return CANCELLED_ERROR, []
         except Exception as e:
             return f"Error: TTS Generation Failed: {str(e)}", []
+
+    def start_full_audio_stream(self, text, voice, rate, scope=None):
+        """
+        Starts rendering the full text without waiting for it to finish.
+        The render is fed into a GrowingAudioBuffer that a player can start on after
+        the first few hundred milliseconds (see audio_stream.PREROLL_BYTES).
+
+        Returns:
+            tuple: (buffer: GrowingAudioBuffer or None when served from cache,
+                    future: concurrent.futures.Future resolving to audio_filepath or Error string,
+                    sentence_list: list)
+        """
+        future = concurrent.futures.Future()
+        if not text.strip():
+            future.set_result("Error: Input text is empty.")
+            return None, future, []
+
+        sentences = self.text_to_sentences(text)
+        full_text_clean = "".join(sentences)
+        cached_path = self._get_audio_file_path(full_text_clean, voice, rate, prefix="full")
+
+        if self._has_audio(cached_path):
+            print(f"TTS Full Cache Hit: Found audio at {cached_path}")
+            self.manifest.hit(cached_path)
+            future.set_result(cached_path)
+            return None, future, sentences
+
+        # Join a render of the same file that is already streaming
+        buffer = self._streams.get(cached_path)
+        if buffer is None or buffer.error is not None:
+            buffer = GrowingAudioBuffer()
+            self._streams[cached_path] = buffer
+        print(f"TTS Full Cache Miss: Streaming new audio to {cached_path}")
+
+        async def _render():
+            try:
+                await self._single_flight.run(
+                    cached_path, lambda: self._render_full(sentences, voice, rate, cached_path, buffer))
+                return cached_path
+            except Exception as e:
+                return f"Error: TTS Generation Failed: {str(e)}"
+            finally:
+                if self._streams.get(cached_path) is buffer:
+                    del self._streams[cached_path]
+                if not buffer.done:
+                    # Another caller owned the render; its bytes went to a different buffer
+                    if self._has_audio(cached_path):
+                        buffer.append(self._read_audio(cached_path))
+                        buffer.finish(cached_path)
+                    else:
+                        buffer.fail("render did not complete")
+
+        inner = self.submit(_render(), scope=scope)
+
+        def _relay(f):
+            if f.cancelled():
+                if not buffer.done:
+                    buffer.fail("cancelled")
+                future.set_result(CANCELLED_ERROR)
+            else:
+                future.set_result(f.result())
+
+        inner.add_done_callback(_relay)
+        return buffer, future, sentences
+
+    def assemble_full_audio(self, sentences, voice, rate, scope=None, resumable=False):
+        """
+        Builds the full-text audio by joining the cached single sentence segments
+        at the MP3 frame level. Missing segments are synthesized first through the
+        batch path (journaled with resumable=True, see submit_batch); segments
+        already in the cache are reused as-is.
+
+        Returns:
+            str: audio_filepath or Error string
+        """
+        if not sentences:
+            return "Error: Input text is empty."
+
+        cached_path = self._get_audio_file_path("".join(sentences), voice, rate, prefix="joined")
+        if self._has_audio(cached_path):
+            print(f"TTS Joined Cache Hit: Found audio at {cached_path}")
+            self.manifest.hit(cached_path)
+            return cached_path
+
+        segment_paths = [self._get_audio_file_path(s, voice, rate, prefix="single") for s in sentences]
+        if len(self._cached_subset(segment_paths)) < len(set(segment_paths)):
+            try:
+                batch = self.submit_batch(sentences, voice, rate, scope=scope, resumable=resumable).result()
+            except concurrent.futures.CancelledError:
+                return CANCELLED_ERROR
+            if not batch:
+                return "Error: TTS Generation Failed: one or more sentence segments could not be generated."
+
+        try:
+            durations = []
+            concat_mp3_files([self.audio_source(p) for p in segment_paths], cached_path, durations)
+            print(f"TTS Joined: Assembled {len(segment_paths)} segments into {cached_path}")
+            self.manifest.add(cached_path, duration_ms=round(sum(durations) * 1000), text="".join(sentences))
+            self.cache.request_eviction()
+        except Exception as e:
+            return f"Error: Audio assembly failed: {str(e)}"
+        # Segment lengths are exact cut points, so the joined file gets a sentence index too
+        try:
+            ranges, position = [], 0.0
+            for seconds in durations:
+                ranges.append([round(position * 1000), round((position + seconds) * 1000)])
+                position += seconds
+            write_sentence_index(cached_path, list(sentences), ranges, round(position * 1000))
+        except Exception as e:
+            print(f"Warning: Failed to write sentence index for {cached_path}: {e}")
+        return cached_path
             
     # --- Internal Async for Single Sentence (Used by both Thread 3 and Thread 4) ---
     async def _async_process_single_sentence(self, sentence, voice, rate):
@@ -159,55 +947,410 @@ class TTSEngine:
 
         cached_path = self._get_audio_file_path(sentence, voice, rate, prefix="single")
 
-        if os.path.exists(cached_path):
-            return cached_path
-        
-        # Cache Miss - Generate Audio
-        # Note: Printing during batch runs will slow down logging but is kept for clarity
-        print(f"TTS Single Cache Miss: Generating new single audio to {cached_path}")
-        
-        try:
-            await self._async_generate(sentence, voice, rate, cached_path)
+        if self._has_audio(cached_path):
             return cached_path
-        except Exception as e:
-            return f"Error: TTS Generation Failed: {str(e)}"
+
+        # Identical requests already in flight share one edge-tts call
+        return await self._single_flight.run(
+            cached_path, lambda: self._generate_single_to_cache(sentence, voice, rate, cached_path))
+
+    async def _generate_single_to_cache(self, sentence, voice, rate, cached_path):
+        """Single-flight owner: synthesizes one sentence into cached_path."""
+        async with self._entry_lock(cached_path):
+            # Another caller (or instance of a shared cache) may have finished this file just before
+            if self._has_audio(cached_path):
+                return cached_path
+
+            # Cache Miss - Generate Audio
+            # Note: Printing during batch runs will slow down logging but is kept for clarity
+            print(f"TTS Single Cache Miss: Generating new single audio to {cached_path}")
+
+            try:
+                await self._async_generate(sentence, voice, rate, cached_path)
+                self._store_file(cached_path, text=sentence)
+                return cached_path
+            except Exception as e:
+                return f"Error: TTS Generation Failed: {str(e)}"
 
     # --- Public API for Single Sentence (Thread 3) ---
-    def generate_single_sentence_audio(self, sentence, voice, rate):
+    def generate_single_sentence_audio(self, sentence, voice, rate, scope=None):
         """
         Synchronous wrapper for single sentence processing (for immediate playback).
+        Runs at interactive priority, ahead of any background batch work; if the
+        sentence is already queued by a batch, that request is promoted instead.
         
         Returns:
             str: audio_filepath or Error string
         """
-        return asyncio.run(self._async_process_single_sentence(sentence, voice, rate))
+        try:
+            result = self.submit(self._scheduled_sentence(
+                0, sentence, voice, rate, priority=PRIORITY_INTERACTIVE), scope=scope).result()
+        except concurrent.futures.CancelledError:
+            return CANCELLED_ERROR
+        return result.path if result.ok else result.error
         
+    # --- Internal Scheduled Unit (Thread 3 and Thread 4) ---
+    async def _scheduled_sentence(self, index, sentence, voice, rate, priority=PRIORITY_BACKGROUND):
+        """
+        Runs one sentence through the adaptive limiter with retries.
+        Cache hits bypass the limiter so they do not skew latency measurements.
+        A sentence that is already queued or running is not scheduled twice: the
+        existing request is promoted to `priority` and its result is shared.
+        """
+        started = time.monotonic()
+        if not sentence.strip():
+            return SentenceResult(index, sentence, error="Error: Input sentence is empty.")
+
+        cached_path = self._get_audio_file_path(sentence, voice, rate, prefix="single")
+        while True:
+            if self._has_audio(cached_path):
+                self.manifest.hit(cached_path)
+                return SentenceResult(index, sentence, path=cached_path)
+
+            ticket = self._queued.get(cached_path)
+            if ticket is None:
+                break
+            self._limiter.promote(ticket, priority)
+            try:
+                result = await asyncio.shield(asyncio.wrap_future(ticket.future))
+            except asyncio.CancelledError:
+                if not ticket.future.cancelled() or current_task_cancelling():
+                    raise
+                # The original request was cancelled; schedule this one ourselves
+                continue
+            if isinstance(result, dict):
+                # Shared result of a grouped request: {cached_path: path or Error string}
+                result = result.get(cached_path, "Error: Sentence missing from grouped result.")
+            if result.startswith("Error"):
+                return SentenceResult(index, sentence, error=result, elapsed=time.monotonic() - started)
+            return SentenceResult(index, sentence, path=result, elapsed=time.monotonic() - started)
+
+        ticket = SchedulingTicket(priority)
+        self._queued[cached_path] = ticket
+        try:
+            result, attempts = await self._run_with_retries(
+                ticket, lambda: self._async_process_single_sentence(sentence, voice, rate))
+        except BaseException:
+            self._queued.pop(cached_path, None)
+            ticket.future.cancel()
+            raise
+        self._queued.pop(cached_path, None)
+        ticket.future.set_result(result)
+
+        elapsed = time.monotonic() - started
+        if result.startswith("Error"):
+            return SentenceResult(index, sentence, error=result, attempts=attempts, elapsed=elapsed)
+        return SentenceResult(index, sentence, path=result, attempts=attempts, elapsed=elapsed)
+
+    async def _run_with_retries(self, ticket, request):
+        """
+        Acquires a limiter slot for each attempt and feeds the outcome back into it.
+
+        Args:
+            ticket: SchedulingTicket of the request (carries its priority).
+            request: Zero-argument callable returning a coroutine that yields a
+                result string (an "Error..." string on failure).
+
+        Returns:
+            tuple: (result string, attempts used)
+        """
+        result = None
+        for attempt in range(1, self._max_attempts + 1):
+            await self._limiter.acquire(ticket.priority, ticket)
+            request_start = time.monotonic()
+            try:
+                result = await request()
+            except BaseException:
+                self._limiter.abandon()
+                raise
+            failed = result.startswith("Error")
+            throttled = failed and is_throttle_error(result)
+            self._limiter.release(success=not failed,
+                                  latency=time.monotonic() - request_start,
+                                  throttled=throttled)
+            if not failed:
+                return result, attempt
+            if attempt < self._max_attempts:
+                # Exponential backoff; throttled requests also wait out the limiter cooldown
+                await asyncio.sleep(0.5 * (2 ** (attempt - 1)))
+        return result, self._max_attempts
+
+    # --- Grouped Requests (several sentences per edge-tts call) ---
+    async def _scheduled_group(self, members, voice, rate, priority=PRIORITY_BACKGROUND):
+        """
+        Synthesizes consecutive sentences in one request and cuts the result back
+        into their single_* cache entries. Members are registered like scheduled
+        sentences, so an interactive request for one of them promotes the group.
+
+        Args:
+            members: [(index, sentence, cached_path), ...] in text order.
+
+        Returns:
+            list: SentenceResult per member.
+        """
+        started = time.monotonic()
+        ticket = SchedulingTicket(priority)
+        for _, _, path in members:
+            self._queued[path] = ticket
+
+        def _unregister():
+            for _, _, path in members:
+                if self._queued.get(path) is ticket:
+                    del self._queued[path]
+
+        try:
+            result, attempts = await self._run_with_retries(
+                ticket, lambda: self._synthesize_group(members, voice, rate))
+        except BaseException:
+            _unregister()
+            ticket.future.cancel()
+            raise
+
+        missing = [m for m in members if not self._has_audio(m[2])]
+        if result.startswith("Error") or missing:
+            # Let waiters schedule themselves and fall back to one request per sentence
+            if result.startswith("Error"):
+                print(f"Grouped request for {len(members)} sentences failed ({result}); retrying individually")
+                missing = members
+            _unregister()
+            ticket.future.cancel()
+            fallback = await asyncio.gather(*(
+                self._scheduled_sentence(i, s, voice, rate, priority=ticket.priority) for i, s, _ in missing))
+            by_index = {r.index: r for r in fallback}
+        else:
+            _unregister()
+            ticket.future.set_result({path: path for _, _, path in members})
+            by_index = {}
+
+        elapsed = time.monotonic() - started
+        return [by_index.get(i) or SentenceResult(i, s, path=path, attempts=attempts, elapsed=elapsed)
+                for i, s, path in members]
+
+    async def _synthesize_group(self, members, voice, rate):
+        """
+        One edge-tts request for all members; boundary events decide where to cut.
+
+        Returns:
+            str: "OK" or Error string.
+        """
+        sentences = [s for _, s, _ in members]
+        text = "".join(sentences)
+        group_path = self._get_audio_file_path(text, voice, rate, prefix="group")
+        async with self._entry_lock(group_path):
+            # Another instance of a shared cache may have rendered the same group meanwhile
+            if self.shared is not None and all(self._has_audio(path) for _, _, path in members):
+                return "OK"
+            boundaries = []
+            print(f"TTS Group Cache Miss: Generating {len(members)} sentences in one request")
+            try:
+                await self._async_generate(text, voice, rate, group_path, boundaries=boundaries)
+                with open(group_path, "rb") as fp:
+                    data = fp.read()
+            except Exception as e:
+                return f"Error: TTS Generation Failed: {str(e)}"
+            finally:
+                # The grouped render is only an intermediate; the cache keeps single_* entries
+                if os.path.exists(group_path):
+                    os.unlink(group_path)
+
+            duration_ms = frames_duration(audio_frames(data)) * 1000
+            ranges = build_sentence_ranges(sentences, boundaries, duration_ms)
+            if not ranges:
+                return "Error: Grouped request returned no boundary metadata to split on."
+            for (_, sentence, path), (start_ms, end_ms) in zip(members, ranges):
+                if not self._has_audio(path):
+                    self._slice_into_cache(data, start_ms, end_ms, path, sentence)
+            return "OK"
+
+    async def _scheduled_split(self, index, sentence, pieces, voice, rate, priority=PRIORITY_BACKGROUND):
+        """
+        Synthesizes an overlong sentence as several smaller requests (its clause
+        pieces, cached like single sentences) and joins them into the sentence's
+        single_* cache entry.
+
+        Returns:
+            SentenceResult
+        """
+        started = time.monotonic()
+        cached_path = self._get_audio_file_path(sentence, voice, rate, prefix="single")
+        if self._has_audio(cached_path):
+            return SentenceResult(index, sentence, path=cached_path, elapsed=time.monotonic() - started)
+
+        ticket = SchedulingTicket(priority)
+        self._queued[cached_path] = ticket
+        try:
+            results = await asyncio.gather(*(
+                self._scheduled_sentence(index, piece, voice, rate, priority=priority) for piece in pieces))
+        except BaseException:
+            self._queued.pop(cached_path, None)
+            ticket.future.cancel()
+            raise
+        failed = [r for r in results if not r.ok]
+        if failed:
+            result = failed[0].error
+        else:
+            try:
+                concat_mp3_files([self.audio_source(r.path) for r in results], cached_path)
+                self._store_file(cached_path, text=sentence)
+                print(f"TTS Single Joined: {cached_path} from {len(pieces)} pieces")
+                result = cached_path
+            except Exception as e:
+                result = f"Error: Failed to join sentence pieces: {str(e)}"
+        self._queued.pop(cached_path, None)
+        ticket.future.set_result(result)
+
+        attempts = max(r.attempts for r in results)
+        if result.startswith("Error"):
+            return SentenceResult(index, sentence, error=result, attempts=attempts,
+                                  elapsed=time.monotonic() - started)
+        return SentenceResult(index, sentence, path=result, attempts=attempts,
+                              elapsed=time.monotonic() - started)
+
+    def _plan_batch_units(self, sentences, voice, rate, group_chars, split_chars):
+        """
+        Chunk plan for a batch (see chunk_planner): short uncached neighbours are
+        grouped up to group_chars characters, sentences longer than split_chars are
+        sub-split. Cached, duplicate or already-queued sentences get units of their
+        own (they resolve without a new request).
+
+        Returns:
+            tuple: (list of SynthesisChunk, single_* path per sentence)
+        """
+        paths = [self._get_audio_file_path(s, voice, rate, prefix="single") for s in sentences]
+        # One bulk lookup for the whole batch
+        cached = self._cached_subset(paths)
+        planned = set()
+
+        def _plannable(i):
+            path = paths[i]
+            if not sentences[i].strip() or path in planned or path in self._queued or path in cached:
+                return False
+            planned.add(path)
+            return True
+
+        return plan_chunks(sentences, group_chars, split_chars, plannable=_plannable), paths
+
+    def _unit_task(self, chunk, sentences, paths, voice, rate):
+        """Coroutine synthesizing one planned unit (SentenceResult or list of them)."""
+        if chunk.pieces:
+            i = chunk.indices[0]
+            return self._scheduled_split(i, sentences[i], chunk.pieces, voice, rate)
+        if len(chunk.indices) > 1:
+            return self._scheduled_group([(i, sentences[i], paths[i]) for i in chunk.indices], voice, rate)
+        i = chunk.indices[0]
+        return self._scheduled_sentence(i, sentences[i], voice, rate)
+
+    def _plan_batch_tasks(self, sentences, voice, rate, group_chars, split_chars):
+        """Builds the batch coroutines from a fresh chunk plan."""
+        chunks, paths = self._plan_batch_units(sentences, voice, rate, group_chars, split_chars)
+        return [self._unit_task(chunk, sentences, paths, voice, rate) for chunk in chunks]
+
+    # --- Resumable Batch Jobs ---
+    def open_journal(self, sentences, voice, rate):
+        """
+        Opens the journal of a batch job over sentences with voice/rate, resuming
+        the one left by an earlier, unfinished run of the same job (see batch_journal).
+        """
+        key = job_key(voice, rate, list(sentences))
+        header = {"job": "batch", "voice": voice, "rate": rate, "sentences": len(sentences), "key": key}
+        jobs_dir = os.path.join(self._audio_dir, JOBS_DIR)
+        if self.shared is not None:
+            # Each instance resumes its own jobs; the same job may run elsewhere at the same time
+            jobs_dir = os.path.join(jobs_dir, self.shared.instance)
+        return BatchJournal(os.path.join(jobs_dir, f"batch_{key}.jsonl"), header)
+
+    def _journaled_tasks(self, sentences, voice, rate, group_chars, split_chars, journal):
+        """
+        Batch coroutines for a journaled job. A resumed job keeps its recorded plan;
+        units recorded as done are answered from the cache without scheduling, the
+        rest (pending or failed) run again and carry their recorded attempt counts.
+        """
+        paths = [self._get_audio_file_path(s, voice, rate, prefix="single") for s in sentences]
+        plan = journal.last("plan")
+        if plan is not None:
+            chunks = [SynthesisChunk(u["indices"], u.get("pieces")) for u in plan["units"]]
+            done = {e["unit"] for e in journal.events("done")}
+            attempts = {e["unit"]: e["attempts"] for e in journal.events("failed")}
+            print(f"Resuming batch job: {len(done)}/{len(chunks)} units done, "
+                  f"{len(attempts.keys() - done)} failed before")
+        else:
+            chunks, paths = self._plan_batch_units(sentences, voice, rate, group_chars, split_chars)
+            journal.append("plan", units=[{"indices": c.indices, "pieces": c.pieces} for c in chunks])
+            done, attempts = set(), {}
+
+        cached = self._cached_subset(paths) if done else set()
+        tasks = []
+        for unit, chunk in enumerate(chunks):
+            if unit in done and all(paths[i] in cached for i in chunk.indices):
+                tasks.append(self._journaled_done(chunk, sentences, paths))
+            else:
+                tasks.append(self._journaled_unit(
+                    journal, unit, self._unit_task(chunk, sentences, paths, voice, rate), attempts.get(unit, 0)))
+        return tasks
+
+    async def _journaled_done(self, chunk, sentences, paths):
+        return [SentenceResult(i, sentences[i], path=paths[i]) for i in chunk.indices]
+
+    async def _journaled_unit(self, journal, unit, task, prior_attempts):
+        """Runs one unit and records its outcome (a cancelled unit records nothing)."""
+        outcome = await task
+        results = outcome if isinstance(outcome, list) else [outcome]
+        attempts = prior_attempts + max((r.attempts for r in results), default=0)
+        failed = [r for r in results if not r.ok]
+        if failed:
+            journal.append("failed", unit=unit, attempts=attempts, error=failed[0].error)
+        else:
+            journal.append("done", unit=unit)
+        for r in results:
+            r.attempts = prior_attempts + r.attempts
+        return results
+
     # --- Public API for Batch Processing (Thread 4) ---
-    async def process_all_sentences(self, sentences, voice, rate):
+    async def process_all_sentences(self, sentences, voice, rate, group_chars=None, split_chars=None,
+                                    journal=None):
         """
-        Asynchronously processes and caches audio for an entire list of sentences CONCURRENTLY.
+        Asynchronously processes and caches audio for an entire list of sentences.
+        Requests run concurrently inside an adaptive window (see AdaptiveConcurrencyLimiter)
+        instead of all at once.
+
+        Requests are sized by the chunk planner: with group_chars > 0 (default:
+        self.group_chars) consecutive sentences are combined into one request of up
+        to that many characters and split back into per-sentence single_* entries
+        using the boundary metadata; with split_chars > 0 (default: self.split_chars)
+        longer sentences are synthesized as clause pieces and joined. The sentence
+        list and cache entries are the same either way.
+
+        With a journal (see open_journal) the plan and every unit's outcome are
+        recorded, and a job interrupted earlier continues where it stopped.
         
         Returns:
-            bool: True on success, False if any sentence generation failed.
+            BatchResult: per-sentence results; truthy when every sentence succeeded.
         """
         if not sentences:
-            return True
-        
-        print(f"Starting concurrent batch generation for {len(sentences)} sentences...")
+            return BatchResult([])
+        group_chars = self.group_chars if group_chars is None else group_chars
+        split_chars = self.split_chars if split_chars is None else split_chars
         
-        tasks = [self._async_process_single_sentence(s, voice, rate) for s in sentences]
+        print(f"Starting concurrent batch generation for {len(sentences)} sentences "
+              f"(window {self._limiter.limit}/{self._limiter.maximum})...")
         
-        # Run all generation tasks concurrently using asyncio.gather
-        results = await asyncio.gather(*tasks)
+        if journal is not None:
+            tasks = self._journaled_tasks(sentences, voice, rate, group_chars, split_chars, journal)
+        elif group_chars > 0 or split_chars > 0:
+            tasks = self._plan_batch_tasks(sentences, voice, rate, group_chars, split_chars)
+        else:
+            tasks = [self._scheduled_sentence(i, s, voice, rate) for i, s in enumerate(sentences)]
+        results = []
+        for outcome in await asyncio.gather(*tasks):
+            results.extend(outcome if isinstance(outcome, list) else [outcome])
+        batch = BatchResult(results)
         
-        # Check results
-        success = True
-        for i, result in enumerate(results):
-            if result.startswith("Error"):
-                print(f"Error during pre-caching sentence {i+1}: {result}")
-                success = False
+        for result in batch.failed:
+            print(f"Error during pre-caching sentence {result.index+1}: {result.error}")
+        print(f"Batch finished: {len(batch.succeeded)}/{len(batch)} succeeded, "
+              f"window now {self._limiter.window:.1f}")
                 
-        return success
+        return batch
 
 
 # --- Testing Block ---
@@ -272,17 +1415,17 @@ if __name__ == "__main__":
     
     print("\n6. Testing Batch Sentence Processing CONCURRENTLY (Cache Miss for singles):")
     start_time_batch = time.time()
-    batch_success_1 = asyncio.run(test_engine.process_all_sentences(sentences, test_voice, test_rate))
+    batch_success_1 = test_engine.submit_batch(sentences, test_voice, test_rate).result()
     end_time_batch = time.time()
-    print(f"Batch Processing Success (1): {batch_success_1}")
+    print(f"Batch Processing Success (1): {bool(batch_success_1)} {batch_success_1}")
     print(f"Batch Time Taken (1): {end_time_batch - start_time_batch:.2f}s")
 
     # 3. Test Batch Processing CONCURRENTLY (Cache Hit for individual sentences)
     print("\n7. Testing Batch Sentence Processing CONCURRENTLY (Cache Hit for singles):")
     start_time_batch_cache = time.time()
-    batch_success_2 = asyncio.run(test_engine.process_all_sentences(sentences, test_voice, test_rate))
+    batch_success_2 = test_engine.submit_batch(sentences, test_voice, test_rate).result()
     end_time_batch_cache = time.time()
-    print(f"Batch Processing Success (2): {batch_success_2}")
+    print(f"Batch Processing Success (2): {bool(batch_success_2)} {batch_success_2}")
     print(f"Batch Time Taken (2): {end_time_batch_cache - start_time_batch_cache:.2f}s")
 
 
@@ -303,6 +1446,8 @@ if __name__ == "__main__":
         print("Status: FAILED. Cache retrieval was slow.")
         
 
+    test_engine.shutdown()
+
     # Cleanup (Optional)
     # shutil.rmtree("test_audio_cache")
     # print("\nCleaned up test_audio_cache directory.")
\ No newline at end of file
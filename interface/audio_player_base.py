@@ -8,7 +8,7 @@ audio_player_base.py
 import threading
 import time
 from abc import ABC, abstractmethod
-from typing import Optional, Callable
+from typing import Optional, Callable, BinaryIO, Sequence, Union
 
 
 class AudioPlayerBase(ABC):
@@ -53,6 +53,14 @@ class AudioPlayerBase(ABC):
         """查询底层是否仍在播放（busy）。"""
         raise NotImplementedError
 
+    # ------- 可选能力（默认不支持，具体实现按需覆盖） -------
+    def _load_stream(self, stream: BinaryIO) -> bool:
+        """
+        从仍在增长的文件对象加载音频（边合成边播放）。
+        stream 的 read() 会阻塞直到数据到达；不支持时返回 False，调用方改为等待完整文件。
+        """
+        return False
+
     # ------- 公共控制接口（已实现通用逻辑） -------
     def play(
         self,
@@ -87,6 +95,32 @@ class AudioPlayerBase(ABC):
         play_thread.start()
         return True
 
+    def play_stream(
+        self,
+        stream: BinaryIO,
+        repeat_count: int = 1,
+        interval_ms: int = 500,
+        on_complete: Optional[Callable] = None,
+    ) -> bool:
+        """
+        与 play() 相同，但音频来源是仍在写入的流（见 core.audio_stream.GrowingAudioReader）。
+
+        Returns:
+            True 表示已开始播放线程；False 表示当前平台不支持流式加载
+        """
+        if not self._load_stream(stream):
+            return False
+
+        self._on_complete_callback = on_complete
+        self.is_playing = True
+        self.is_paused = False
+
+        play_thread = threading.Thread(
+            target=self._playback_loop, args=(repeat_count, interval_ms), daemon=True
+        )
+        play_thread.start()
+        return True
+
     def _playback_loop(self, repeat_count: int, interval_ms: int):
         """后台播放循环（通用逻辑）。"""
         infinite = (repeat_count == -1)
@@ -109,7 +143,81 @@ class AudioPlayerBase(ABC):
             else:
                 time.sleep(0.1)
 
-        # 自然完成
+        self._finish_playback()
+
+    def play_sequence(
+        self,
+        items: Sequence[Callable[[], Optional[Union[str, BinaryIO]]]],
+        repeat_count: int = 1,
+        interval_ms: int = 500,
+        on_complete: Optional[Callable] = None,
+    ) -> bool:
+        """
+        依次播放多个音频文件（如逐句合成的整段文本），播放线程在后台进行。
+        每个条目是一个返回文件路径（或可 seek 的文件对象）的可调用对象，可阻塞直至该文件就绪，
+        因此后续句子可以在前一句播放时继续合成。返回 None 的条目会被跳过。
+        repeat_count / interval_ms 作用于整个序列。
+
+        Returns:
+            True 表示已开始播放线程；False 表示序列为空
+        """
+        if not items:
+            return False
+
+        self._on_complete_callback = on_complete
+        self.is_playing = True
+        self.is_paused = False
+
+        play_thread = threading.Thread(
+            target=self._sequence_loop, args=(list(items), repeat_count, interval_ms), daemon=True
+        )
+        play_thread.start()
+        return True
+
+    def _sequence_loop(self, items, repeat_count: int, interval_ms: int):
+        """后台序列播放循环：逐项等待路径就绪、加载并播放。"""
+        infinite = (repeat_count == -1)
+        play_counter = 0
+        resolved = [None] * len(items)
+
+        while self.is_playing and (infinite or play_counter < repeat_count):
+            played = 0
+            for i, item in enumerate(items):
+                if not self.is_playing:
+                    break
+                try:
+                    if resolved[i] is None:
+                        resolved[i] = item() or ''
+                    if not resolved[i]:
+                        continue
+                    if isinstance(resolved[i], str):
+                        loaded = self._load_audio(resolved[i])
+                    else:
+                        # 文件对象（如打包缓存中的句子）：每轮从头加载
+                        resolved[i].seek(0)
+                        loaded = self._load_stream(resolved[i])
+                    if not loaded:
+                        continue
+                    self._play_once()
+                    played += 1
+                    # 暂停期间保持在当前条目
+                    while self.is_playing and (self.is_paused or self._is_playing_audio()):
+                        time.sleep(0.05)
+                except Exception as e:
+                    print(f"Playback error: {e}")
+                    self._finish_playback()
+                    return
+            if not played:
+                # 没有任何可播放的条目，避免空转
+                break
+            play_counter += 1
+            if self.is_playing and (infinite or play_counter < repeat_count):
+                time.sleep(interval_ms / 1000.0)
+
+        self._finish_playback()
+
+    def _finish_playback(self):
+        """自然完成时复位状态并触发回调。"""
         if self.is_playing and not self.is_paused:
             self.is_playing = False
             if self._on_complete_callback:
@@ -22,6 +22,14 @@ class UIBase(ABC):
         text = self._get_input_text()
         self.controller.process_text(text, auto_play=True)
 
+    def on_click_process_document(self) -> None:
+        file_path = self._select_document_file()
+        if file_path:
+            self.controller.process_document(file_path)
+
+    def on_click_clear_cache(self) -> None:
+        self.controller.clear_cache()
+
     def on_click_ocr(self) -> None:
         file_path = self._select_ocr_file()
         if file_path:
@@ -36,6 +44,9 @@ class UIBase(ABC):
     def on_click_stop(self) -> None:
         self.controller.stop_audio()
 
+    def on_text_changed(self) -> None:
+        self.controller.on_input_changed(self._get_input_text())
+
     def on_change_voice(self, voice_name: str) -> None:
         self.controller.set_voice(voice_name)
 
@@ -78,6 +89,10 @@ class UIBase(ABC):
         """打开文件选择并返回图片路径；若用户取消返回空串/None。"""
         pass
 
+    def _select_document_file(self) -> str:
+        """打开文件选择并返回长文档 (文本文件) 路径; 不支持或用户取消时返回空串。"""
+        return ''
+
     @abstractmethod
     def _get_sentence_text(self, idx: int) -> str:
         """根据列表索引返回对应句子文本。"""
@@ -30,6 +30,15 @@ class PygameAudioPlayer(AudioPlayerBase):
             print(f"[Desktop] Failed to load audio: {e}")
             return False
 
+    def _load_stream(self, stream) -> bool:
+        # pygame 2 accepts file-like objects; the name hint selects the MP3 decoder
+        try:
+            self._pg.mixer.music.load(stream, "mp3")
+            return True
+        except Exception as e:
+            print(f"[Desktop] Failed to load audio stream: {e}")
+            return False
+
     def _play_once(self):
         self._pg.mixer.music.play()
 
@@ -119,9 +119,15 @@ class TkinterUI(UIBase):
         ttk.Label(left, text="Input Chinese Text").pack(anchor=tk.W)
         self.text_input = scrolledtext.ScrolledText(left, height=25, width=60, font=("Segoe UI", 10))
         self.text_input.pack(fill=tk.BOTH, expand=True)
+        self.text_input.bind("<<Modified>>", lambda e: self._on_text_modified())
         ttk.Button(left, text="Process Text & Generate Audio", style="Accent.TButton",
                    command=self.on_click_process).pack(pady=6, fill=tk.X)
 
+        ttk.Button(left, text="Process Text File (Book Mode)",
+                   command=self.on_click_process_document).pack(pady=4, fill=tk.X)
+
+        ttk.Button(left, text="Clear Audio Cache", command=self.on_click_clear_cache).pack(pady=4, fill=tk.X)
+
         # ✅ 只在支持 OCR 的平台显示按钮
         if self.controller.is_ocr_supported():
             ttk.Button(left, text="Select Image for OCR", command=self.on_click_ocr).pack(pady=4, fill=tk.X)
@@ -183,6 +189,11 @@ class TkinterUI(UIBase):
             filetypes=[("Image Files", "*.png;*.jpg;*.jpeg;*.bmp;*.gif")]
         )
 
+    def _select_document_file(self) -> str:
+        return filedialog.askopenfilename(
+            filetypes=[("Text Files", "*.txt"), ("All Files", "*.*")]
+        )
+
     def _get_sentence_text(self, idx: int) -> str:
         try:
             return self.sentence_list.get(idx)
@@ -206,6 +217,12 @@ class TkinterUI(UIBase):
         self.on_change_repeat(mode=self.mode_var.get(), infinite=self.infinite_var.get(),
                               count=count, interval_ms=interval_ms)
 
+    def _on_text_modified(self):
+        # <<Modified>> 只触发一次, 需重置标志才能收到下一次修改
+        if self.text_input.edit_modified():
+            self.text_input.edit_modified(False)
+            self.on_text_changed()
+
     def _on_double_click_list(self):
         idxs = self.sentence_list.curselection()
         if idxs:
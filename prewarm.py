@@ -0,0 +1,65 @@
+# prewarm.py
+"""
+Headless corpus pre-warm for Mandarin TTS Tool.
+Renders every sentence of the given text files for the chosen voices and rates
+and writes a versioned cache pack (see core/prewarm.py and core/cache_pack.py).
+Copy the pack into the app's cache_packs directory, or list its parent
+directory in MANDARIN_TTS_CACHE_PACKS, and the app mounts it read-only at startup.
+
+    python prewarm.py hsk1_vocab.txt hsk1_dialogues.txt --name hsk1 --version 3 \
+        --voice "Mandarin Female (Xiaoyi)" --voice zh-CN-YunxiNeural --rate 0 --rate -20 \
+        --max-requests 5000 --max-kbps 256
+
+Without --voice every voice of VOICE_DICT is rendered. Run the same command
+again to continue a job stopped by a budget or by failures.
+"""
+
+import argparse
+import sys
+
+from core.cache_pack import CACHE_PACKS_DIR
+from core.prewarm import prewarm_corpus, read_corpus
+from core.tts_engine import VOICE_DICT, TTSEngine
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description="Render a corpus into a read-only cache pack.")
+    parser.add_argument("corpus", nargs="+", help="Text files with the course material")
+    parser.add_argument("--name", required=True, help="Pack name, e.g. hsk1")
+    parser.add_argument("--version", required=True, help="Pack version, e.g. 3 or 2024.1")
+    parser.add_argument("--voice", action="append", default=[],
+                        help="VOICE_DICT name or voice id (repeatable; default: all voices)")
+    parser.add_argument("--rate", action="append", type=int, default=[],
+                        help="Speech rate in percent (repeatable; default: 0)")
+    parser.add_argument("--output", default=CACHE_PACKS_DIR, help="Directory the pack is written to")
+    parser.add_argument("--max-requests", type=int, default=None, help="Request budget for this run")
+    parser.add_argument("--max-kbps", type=float, default=None, help="Bandwidth budget in KiB/s")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    voices = [VOICE_DICT.get(v, v) for v in args.voice] or list(VOICE_DICT.values())
+    rates = args.rate or [0]
+    sentences = read_corpus(args.corpus)
+    print(f"Prewarm: {len(sentences)} unique sentences x {len(voices)} voices x {len(rates)} rates")
+
+    # The pack is the product; the local cache must not evict entries before they are packed
+    engine = TTSEngine(cache_budget_bytes=0)
+    try:
+        report = prewarm_corpus(
+            engine, sentences, voices, rates, args.output, args.name, args.version,
+            max_requests=args.max_requests,
+            max_bytes_per_s=args.max_kbps * 1024 if args.max_kbps else None,
+            on_progress=lambda voice, rate, done, total: print(f"Prewarm: {voice} {rate:+d}% {done}/{total}"))
+    except FileExistsError as e:
+        print(f"Error: {e}")
+        return 1
+    finally:
+        engine.shutdown()
+    print(report)
+    return 0 if report.complete else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())